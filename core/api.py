@@ -1,8 +1,9 @@
-from django.http import HttpRequest
+import math
 from ninja_extra import NinjaExtraAPI
 from ninja.errors import ValidationError, HttpError
 from ninja_extra.exceptions import APIException
-from ninja_jwt.authentication import JWTAuth
+from core.authentication import AsyncCustomJWTAuth
+from core.renderers import renderer
 from users.controllers.auth import AuthController
 from users.controllers.users import UserController
 from organizations.controllers.job_title import JobTitleController
@@ -10,14 +11,10 @@ from organizations.controllers.salary_grade import SalaryGradeController
 from organizations.controllers.department import DepartmentController
 from organizations.controllers.employment_type import EmploymentTypeController
 from organizations.controllers.job_level import JobLevelController
+from organizations.controllers.bootstrap import BootstrapController
 
 
-class CustomJWTAuth(JWTAuth):
-    def authenticate(self, request: HttpRequest, token: str):
-        token = request.COOKIES.get('access_token')
-        return self.jwt_authenticate(request, token)
-
-api = NinjaExtraAPI(auth=CustomJWTAuth())
+api = NinjaExtraAPI(auth=AsyncCustomJWTAuth(), renderer=renderer)
 api.register_controllers(AuthController)
 api.register_controllers(UserController)
 api.register_controllers(JobTitleController)
@@ -25,6 +22,7 @@ api.register_controllers(SalaryGradeController)
 api.register_controllers(DepartmentController)
 api.register_controllers(EmploymentTypeController)
 api.register_controllers(JobLevelController)
+api.register_controllers(BootstrapController)
 
 
 @api.exception_handler(APIException)
@@ -32,7 +30,7 @@ def generic_api_exception_handler(request, exc: APIException):
     status = exc.default_code
     message = exc.detail
 
-    return api.create_response(
+    response = api.create_response(
         request,
         {
             "status": status,
@@ -40,6 +38,11 @@ def generic_api_exception_handler(request, exc: APIException):
         },
         status=exc.status_code
     )
+    # Throttled and unavailable responses tell the client when to retry
+    wait = getattr(exc, 'wait', None)
+    if wait is not None:
+        response['Retry-After'] = str(math.ceil(wait))
+    return response
 
 @api.exception_handler(ValidationError)
 def ninja_validation_error_handler(request, exc: ValidationError):
@@ -48,7 +51,10 @@ def ninja_validation_error_handler(request, exc: ValidationError):
 
     for error in exc.errors:
         message = error['msg']
-        errors.append({'field': error['loc'][2], 'message': message})
+        # Body errors are located as (body, payload, *path), query ones as (query, field)
+        loc = error['loc']
+        field = '.'.join(str(part) for part in loc[2:]) if len(loc) > 2 else loc[-1]
+        errors.append({'field': field, 'message': message})
     
     return api.create_response(
         request,
@@ -0,0 +1,78 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.utils.translation import gettext_lazy as _
+from ninja_extra.security import AsyncHttpBearer
+from ninja_jwt.authentication import JWTAuth
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken
+from ninja_jwt.settings import api_settings
+from users.cache import (
+    aapply_role_claims,
+    aget_user_roles,
+    aget_user_snapshot,
+    apply_role_claims,
+    get_user_snapshot,
+    store_user_snapshot
+)
+
+
+class CustomJWTAuth(JWTAuth):
+    def authenticate(self, request: HttpRequest, token: str):
+        token = request.COOKIES.get('access_token')
+        return self.jwt_authenticate(request, token)
+
+    def get_user(self, validated_token):
+        auth_user_cache = getattr(settings, 'AUTH_USER_CACHE', {})
+        if auth_user_cache.get('ENABLED', True):
+            user = self._get_cached_user(validated_token)
+        else:
+            user = super().get_user(validated_token)
+
+        if auth_user_cache.get('ROLE_CLAIMS', False):
+            apply_role_claims(user, validated_token)
+
+        return user
+
+    def _get_cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = get_user_snapshot(user_id) if user_id else None
+        if user is None:
+            # Falls back to the database lookup and its validations
+            user = super().get_user(validated_token)
+            store_user_snapshot(user)
+        elif not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
+
+
+class AsyncCustomJWTAuth(CustomJWTAuth, AsyncHttpBearer):
+    """
+    `CustomJWTAuth` for async routes. Users found in the snapshot cache are
+    read with async cache calls, and the user's roles are resolved before
+    the route's permission classes run, which leaves them no I/O to do.
+    """
+    async def authenticate(self, request: HttpRequest, token: str):
+        request.user = AnonymousUser()
+        validated_token = self.get_validated_token(request.COOKIES.get('access_token'))
+        user = await self.aget_user(validated_token)
+        await aget_user_roles(user)
+        request.user = user
+        return user
+
+    async def aget_user(self, validated_token):
+        auth_user_cache = getattr(settings, 'AUTH_USER_CACHE', {})
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not user_id:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = await aget_user_snapshot(user_id) if auth_user_cache.get('ENABLED', True) else None
+        if user is None:
+            # Misses take the sync path, which loads and stores the snapshot
+            return await sync_to_async(self.get_user)(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+
+        if auth_user_cache.get('ROLE_CLAIMS', False):
+            await aapply_role_claims(user, validated_token)
+        return user
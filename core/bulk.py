@@ -0,0 +1,192 @@
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import capfirst
+from ninja import Schema
+from ninja_extra.exceptions import ValidationError
+from pydantic import UUID4, create_model
+from core.cache import invalidate_models
+
+
+BULK_OPERATIONS = getattr(settings, 'BULK_OPERATIONS', {})
+
+
+class BulkDeleteInput(Schema):
+    ids: List[UUID4]
+
+
+class BulkPatch:
+    """
+    `BulkPatch[Schema]` is `Schema` with every field optional plus the `id`
+    of the row to update, the bulk counterpart of ninja's `PatchDict`.
+    """
+    def __class_getitem__(cls, schema):
+        return _create_patch_schema(schema)
+
+
+@lru_cache(maxsize=None)
+def _create_patch_schema(schema):
+    fields = {
+        name: (Optional[field_info.annotation], None)
+        for name, field_info in schema.model_fields.items()
+    }
+    return create_model(f'{schema.__name__}BulkPatch', __base__=Schema, id=(UUID4, ...), **fields)
+
+
+class BulkOperation:
+    """
+    Creates, updates or deletes many rows of `model` in one transaction.
+    Every item is checked first (unique fields, foreign keys, missing rows)
+    and nothing is written unless all of them pass, otherwise the raised
+    `ValidationError` lists the errors of each failing item by its index.
+
+    `field_names` maps payload names that differ from the model's.
+    """
+    def __init__(self, model, field_names: Optional[Dict[str, str]] = None):
+        self.model = model
+        self.field_names = field_names or {}
+        self.batch_size = BULK_OPERATIONS.get('BATCH_SIZE', 500)
+        self.max_items = BULK_OPERATIONS.get('MAX_ITEMS', 5000)
+        self.errors = []
+
+    def add_error(self, index, field, message):
+        self.errors.append({'index': index, 'field': field, 'message': message})
+
+    def raise_errors(self):
+        if self.errors:
+            errors = sorted(self.errors, key=lambda error: error['index'])
+            self.errors = []
+            raise ValidationError(errors, 422)
+
+    def check_size(self, items):
+        if len(items) > self.max_items:
+            raise ValidationError({'items': f'At most {self.max_items} items can be processed at once.'}, 422)
+
+    def to_model_values(self, data: dict) -> dict:
+        # Foreign keys arrive as primary keys, assign them to `<field>_id`
+        values = {}
+        for name, value in data.items():
+            field = self.model._meta.get_field(self.field_names.get(name, name))
+            values[field.attname] = value
+        return values
+
+    def check_not_null(self, items: List[dict]):
+        for field in self.model._meta.concrete_fields:
+            if field.null:
+                continue
+            for index, values in items:
+                if field.attname in values and values[field.attname] is None:
+                    self.add_error(index, field.name, 'This field may not be null.')
+
+    def check_foreign_keys(self, items: List[dict]):
+        for field in self.model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            pks = {values[field.attname] for _, values in items if values.get(field.attname) is not None}
+            if not pks:
+                continue
+            found = set(field.related_model._default_manager.filter(pk__in=pks).values_list('pk', flat=True))
+            for index, values in items:
+                if values.get(field.attname) is not None and values[field.attname] not in found:
+                    self.add_error(index, field.name, f'{capfirst(field.related_model._meta.verbose_name)} does not exist.')
+
+    def check_unique(self, items: List[dict]):
+        for field in self.model._meta.concrete_fields:
+            if not field.unique or field.primary_key:
+                continue
+            given = [(index, values) for index, values in items if values.get(field.attname) is not None]
+            if not given:
+                continue
+
+            counts = Counter(values[field.attname] for _, values in given)
+            taken = dict(
+                self.model._default_manager
+                .filter(**{f'{field.attname}__in': list(counts)})
+                .values_list(field.attname, 'pk')
+            )
+            # Values can't move between rows of the batch either: unique
+            # constraints are checked as each row is written, so a swap fails
+            for index, values in given:
+                value = values[field.attname]
+                owner = taken.get(value)
+                if counts[value] > 1:
+                    self.add_error(index, field.name, f'Duplicate value "{value}" in this batch.')
+                elif owner is not None and owner != values.get('id'):
+                    self.add_error(index, field.name, f'"{value}" is already in use.')
+
+    def create(self, payloads: List[dict]) -> list:
+        self.check_size(payloads)
+        items = [(index, self.to_model_values(data)) for index, data in enumerate(payloads)]
+        self.check_not_null(items)
+        self.check_unique(items)
+        self.check_foreign_keys(items)
+        self.raise_errors()
+
+        objs = [self.model(**values) for _, values in items]
+        with transaction.atomic():
+            self.model._default_manager.bulk_create(objs, batch_size=self.batch_size)
+            # Bulk writes send no save signals
+            invalidate_models(self.model)
+        return objs
+
+    def update(self, payloads: List[dict]) -> list:
+        """
+        Applies the fields set on each payload to the row with its `id`.
+        Rows touching the same fields share one bulk_update, which writes
+        only those columns.
+        """
+        self.check_size(payloads)
+        items = []
+        for index, data in enumerate(payloads):
+            data = dict(data)
+            pk = data.pop('id')
+            values = self.to_model_values(data)
+            values['id'] = pk
+            items.append((index, values))
+
+        ids = Counter(values['id'] for _, values in items)
+        objs = self.model._default_manager.in_bulk(list(ids))
+        for index, values in items:
+            if values['id'] not in objs:
+                self.add_error(index, 'id', f'{capfirst(self.model._meta.verbose_name)} does not exist.')
+            elif ids[values['id']] > 1:
+                self.add_error(index, 'id', 'Duplicate id in this batch.')
+
+        self.check_not_null(items)
+        self.check_unique(items)
+        self.check_foreign_keys(items)
+        self.raise_errors()
+
+        now = timezone.now()
+        auto_now = [field.attname for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        groups = defaultdict(list)
+        for _, values in items:
+            obj = objs[values['id']]
+            fields = tuple(sorted(name for name in values if name != 'id'))
+            for name in fields:
+                setattr(obj, name, values[name])
+            for name in auto_now:
+                setattr(obj, name, now)
+            if fields:
+                groups[fields + tuple(auto_now)].append(obj)
+
+        with transaction.atomic():
+            for fields, group in groups.items():
+                self.model._default_manager.bulk_update(group, fields, batch_size=self.batch_size)
+            invalidate_models(self.model)
+        return [objs[values['id']] for _, values in items]
+
+    def delete(self, ids: list) -> list:
+        self.check_size(ids)
+        found = set(self.model._default_manager.filter(pk__in=ids).values_list('pk', flat=True))
+        for index, pk in enumerate(ids):
+            if pk not in found:
+                self.add_error(index, 'id', f'{capfirst(self.model._meta.verbose_name)} does not exist.')
+        self.raise_errors()
+
+        with transaction.atomic():
+            self.model._default_manager.filter(pk__in=ids).delete()
+        return list(dict.fromkeys(ids))
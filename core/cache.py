@@ -0,0 +1,86 @@
+import hashlib
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+
+
+# m2m_changed actions that change a relation. pre_clear is the only point
+# where the rows about to be cleared can still be read
+M2M_CHANGE_ACTIONS = ('post_add', 'post_remove', 'pre_clear', 'post_clear')
+
+
+def _new_version():
+    # Random tokens rather than counters, so an evicted version can never
+    # make older entries current again
+    return uuid.uuid4().hex[:12]
+
+def get_versions(keys) -> dict:
+    """
+    Returns the version stored under each of `keys`, starting the missing
+    ones, with a single cache round trip once they are all set. Anything
+    cached under a version goes stale once `bump_versions` replaces it.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+async def aget_versions(keys) -> dict:
+    """
+    Async counterpart of `get_versions`.
+    """
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _new_version(), None)
+            versions[key] = await cache.aget(key)
+    return versions
+
+def bump_versions(*keys):
+    cache.set_many({key: _new_version() for key in keys}, None)
+
+def _version_key(model):
+    return f'versions:{model._meta.label_lower}'
+
+def get_model_version_map(models) -> dict:
+    """
+    Returns the current version of each model in `models`.
+    """
+    keys = {model: _version_key(model) for model in models}
+    versions = get_versions(list(keys.values()))
+    return {model: versions[key] for model, key in keys.items()}
+
+async def aget_model_version_map(models) -> dict:
+    """
+    Async counterpart of `get_model_version_map`.
+    """
+    keys = {model: _version_key(model) for model in models}
+    versions = await aget_versions(list(keys.values()))
+    return {model: versions[key] for model, key in keys.items()}
+
+def get_model_versions(models) -> str:
+    """
+    Returns one version string covering `models`. It changes whenever any
+    of their rows is saved or deleted, which makes it suitable as part of
+    the key of anything cached from them.
+    """
+    return '.'.join(get_model_version_map(models).values())
+
+async def aget_model_versions(models) -> str:
+    return '.'.join((await aget_model_version_map(models)).values())
+
+def bump_model_versions(*models):
+    bump_versions(*(_version_key(model) for model in models))
+
+def invalidate_models(*models):
+    """
+    Bumps the versions of `models` once the current transaction commits, so
+    no request can cache rows that are about to change under the new version.
+    """
+    transaction.on_commit(lambda: bump_model_versions(*models))
+
+def make_response_key(request, version) -> str:
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'responses:{path}:{version}'
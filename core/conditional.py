@@ -0,0 +1,90 @@
+import hashlib
+import inspect
+from functools import wraps
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from core.cache import aget_model_versions
+from core.query import get_schema_models
+
+
+def _get_validator_headers(etag_value, modified) -> dict:
+    headers = {}
+    if etag_value:
+        headers['ETag'] = quote_etag(etag_value)
+    if modified:
+        headers['Last-Modified'] = http_date(modified.timestamp())
+    return headers
+
+def _get_not_modified(request, headers, modified):
+    return get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=int(modified.timestamp()) if modified else None
+    )
+
+def _add_validator_headers(controller, response, headers):
+    if not isinstance(response, HttpResponseBase):
+        # Headers of the context response are copied onto the rendered one
+        target = controller.context.response
+    else:
+        target = response
+
+    for header, value in headers.items():
+        target[header] = value
+    return response
+
+
+def conditional(etag=None, last_modified=None):
+    """
+    Conditional GET for controller routes. `etag` and `last_modified` are
+    called with the request and the route's arguments and must be cheap,
+    they run before the view. When the request's `If-None-Match` or
+    `If-Modified-Since` still match, a 304 is returned without running the
+    view, otherwise the validators are added to the view's response.
+
+    On async routes `etag` and `last_modified` must be coroutine functions.
+
+    Place it between `@route` and `@paginate`.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_view(controller, *args, **kwargs):
+                request = controller.context.request
+                modified = await last_modified(request, **kwargs) if last_modified else None
+                headers = _get_validator_headers(await etag(request, **kwargs) if etag else None, modified)
+
+                response = _get_not_modified(request, headers, modified)
+                if response is None:
+                    response = await func(controller, *args, **kwargs)
+                return _add_validator_headers(controller, response, headers)
+            return async_view
+
+        @wraps(func)
+        def view(controller, *args, **kwargs):
+            request = controller.context.request
+            modified = last_modified(request, **kwargs) if last_modified else None
+            headers = _get_validator_headers(etag(request, **kwargs) if etag else None, modified)
+
+            response = _get_not_modified(request, headers, modified)
+            if response is None:
+                response = func(controller, *args, **kwargs)
+            return _add_validator_headers(controller, response, headers)
+        return view
+    return decorator
+
+
+def _get_versions_etag(request, version):
+    return hashlib.md5(f'{request.get_full_path()}:{version}'.encode()).hexdigest()
+
+def aversions_etag(model, schema):
+    """
+    ETag of responses rendering `schema` for `model`, built from the request
+    path and the versions of every model the schema reads. Costs no query.
+    """
+    models = get_schema_models(model, schema)
+
+    async def etag(request, **kwargs):
+        return _get_versions_etag(request, await aget_model_versions(models))
+    return etag
@@ -0,0 +1,26 @@
+from typing import Optional, Type
+from django.db.models import Model, QuerySet
+from ninja_extra import ControllerBase
+from ninja_extra.exceptions import APIException, NotFound
+
+
+class AsyncControllerBase(ControllerBase):
+    """
+    Base of controllers whose routes are coroutines. Object lookups go
+    through the async ORM, anything needing a transaction is left to sync
+    services called with `sync_to_async`.
+    """
+    async def aget_object_or_exception(
+        self,
+        klass: Type[Model] | QuerySet,
+        error_message: Optional[str] = None,
+        exception: Type[APIException] = NotFound,
+        **kwargs
+    ):
+        queryset = klass if isinstance(klass, QuerySet) else klass._default_manager.all()
+        try:
+            obj = await queryset.aget(**kwargs)
+        except queryset.model.DoesNotExist as exc:
+            raise exception(detail=error_message or f'{queryset.model._meta.object_name} was not found.') from exc
+        self.check_object_permissions(obj)
+        return obj
@@ -0,0 +1,136 @@
+from typing import ClassVar, Dict, Set, get_args
+from django.contrib.postgres.indexes import OpClass
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Upper
+from ninja import FilterSchema
+
+
+BTREE = 'btree'
+PATTERN = 'pattern'
+TRIGRAM = 'trigram'
+
+# Index kinds able to serve each lookup on PostgreSQL. Case insensitive
+# lookups compare UPPER(column), so only expression indexes on Upper() serve them.
+LOOKUP_INDEXES = {
+    'exact': {BTREE},
+    'in': {BTREE},
+    'gt': {BTREE},
+    'gte': {BTREE},
+    'lt': {BTREE},
+    'lte': {BTREE},
+    'range': {BTREE},
+    'isnull': {BTREE},
+    'istartswith': {PATTERN, TRIGRAM},
+    'icontains': {TRIGRAM},
+}
+
+PATTERN_OPCLASSES = ('varchar_pattern_ops', 'text_pattern_ops')
+
+
+def _get_index_kind(index):
+    # The kind and column of an index, judged by its leading column
+    if index.fields:
+        # GIN, GiST... indexes on plain columns serve none of the lookups
+        return (BTREE if index.suffix in ('idx', 'btree') else None), index.fields[0].lstrip('-')
+
+    expression = index.expressions[0]
+    opclass = None
+    if isinstance(expression, OpClass):
+        opclass = expression.extra['name']
+        expression = expression.get_source_expressions()[0]
+    if not isinstance(expression, Upper):
+        return None, None
+    column = expression.get_source_expressions()[0]
+    if not isinstance(column, F):
+        return None, None
+    if opclass == 'gin_trgm_ops':
+        return TRIGRAM, column.name
+    if opclass in PATTERN_OPCLASSES:
+        return PATTERN, column.name
+    return None, None
+
+
+def get_indexed_columns(model) -> Dict[str, Set[str]]:
+    """
+    Returns the kinds of index (btree, pattern, trigram) leading with each
+    field of `model`, by field name.
+    """
+    indexed = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.unique or field.db_index:
+            indexed.setdefault(field.name, set()).add(BTREE)
+    for index in model._meta.indexes:
+        kind, column = _get_index_kind(index)
+        if kind:
+            indexed.setdefault(column, set()).add(kind)
+    return indexed
+
+
+def _resolve_lookup(model, path):
+    """
+    Follows `path` through relations, returning the model and field it ends on
+    along with its lookup. Joins run on foreign keys and m2m tables,
+    which are always indexed.
+    """
+    parts = path.split('__')
+    lookup = parts.pop() if parts[-1] in LOOKUP_INDEXES else 'exact'
+    for index, name in enumerate(parts):
+        field = model._meta.get_field(name)
+        if index == len(parts) - 1 or not field.is_relation:
+            return model, field, lookup
+        model = field.related_model
+    raise FieldDoesNotExist(path)
+
+
+class IndexedFilterSchema(FilterSchema):
+    """
+    Filters of a list endpoint, checked against the indexes of `model` when
+    the class is created: every lookup and `ordering` choice must be served
+    by an index, so no combination of query parameters falls back to a
+    sequential scan.
+
+    Subclasses declare `ordering` as an optional `Literal` of field names,
+    each of them optionally prefixed with '-'.
+    """
+    model: ClassVar = None
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        if cls.model is not None:
+            cls.check_indexes()
+
+    @classmethod
+    def check_indexes(cls):
+        for name, field_info in cls.model_fields.items():
+            if name == 'ordering':
+                paths = {choice.lstrip('-') for arg in get_args(field_info.annotation) for choice in get_args(arg)}
+            else:
+                q = (field_info.json_schema_extra or {}).get('q') or name
+                paths = [
+                    f'{name}{path}' if path.startswith('__') else path
+                    for path in ([q] if isinstance(q, str) else q)
+                ]
+
+            for path in paths:
+                model, field, lookup = _resolve_lookup(cls.model, path)
+                if field.is_relation:
+                    # Compared on the foreign key column or m2m table
+                    continue
+                available = get_indexed_columns(model).get(field.name, set())
+                if not available & LOOKUP_INDEXES[lookup]:
+                    raise ImproperlyConfigured(
+                        f'{cls.__name__}.{name} filters on "{path}", '
+                        f'which no index of {model._meta.label} can serve.'
+                    )
+
+    def filter_ordering(self, value) -> Q:
+        return Q()
+
+    def filter(self, queryset: QuerySet) -> QuerySet:
+        queryset = super().filter(queryset)
+        ordering = getattr(self, 'ordering', None)
+        if ordering:
+            queryset = queryset.order_by(ordering)
+        return queryset
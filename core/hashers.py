@@ -0,0 +1,118 @@
+import math
+import time
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+PASSWORD_HASHING = getattr(settings, 'PASSWORD_HASHING', {})
+
+WORK_FACTORS = PASSWORD_HASHING.get('WORK_FACTORS', {})
+
+# Decoded hash fields that make up a hasher's work factor
+WORK_FACTOR_FIELDS = ('iterations', 'work_factor', 'time_cost', 'memory_cost', 'parallelism', 'block_size')
+
+
+def _get_work_factor(algorithm, name, default):
+    return WORK_FACTORS.get(algorithm, {}).get(name, default)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id with the costs of `PASSWORD_HASHING['WORK_FACTORS']['argon2']`.
+    Needs argon2-cffi.
+    """
+    time_cost = _get_work_factor('argon2', 'time_cost', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = _get_work_factor('argon2', 'memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = _get_work_factor('argon2', 'parallelism', hashers.Argon2PasswordHasher.parallelism)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iterations of
+    `PASSWORD_HASHING['WORK_FACTORS']['pbkdf2_sha256']`.
+    """
+    iterations = _get_work_factor('pbkdf2_sha256', 'iterations', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    bcrypt of the SHA-256 of the password, with the rounds of
+    `PASSWORD_HASHING['WORK_FACTORS']['bcrypt_sha256']`.
+    """
+    rounds = _get_work_factor('bcrypt_sha256', 'rounds', hashers.BCryptSHA256PasswordHasher.rounds)
+
+
+def describe_hash(encoded) -> str:
+    """
+    Returns the algorithm and work factor of an encoded password, such as
+    `argon2 time_cost=2 memory_cost=102400 parallelism=8`.
+    """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+        decoded = hasher.decode(encoded)
+    except ValueError:
+        return 'unknown'
+    factors = ' '.join(f'{name}={decoded[name]}' for name in WORK_FACTOR_FIELDS if name in decoded)
+    return f'{hasher.algorithm} {factors}'.strip()
+
+
+def time_hasher(hasher, repeat=3) -> float:
+    """
+    Returns the median time in seconds `hasher` takes to hash a password.
+    """
+    salt = hasher.salt()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hasher.encode('calibration-password', salt)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def _calibrate_pbkdf2(hasher, target, repeat):
+    hasher.iterations = 100_000
+    elapsed = time_hasher(hasher, repeat)
+    # Time grows linearly with the iterations
+    return {'iterations': max(1000, math.floor(hasher.iterations * target / elapsed / 1000) * 1000)}
+
+def _calibrate_bcrypt(hasher, target, repeat):
+    hasher.rounds = 10
+    elapsed = time_hasher(hasher, repeat)
+    # Every round doubles the time
+    return {'rounds': min(31, max(4, hasher.rounds + math.floor(math.log2(target / elapsed))))}
+
+def _calibrate_argon2(hasher, target, repeat):
+    # Memory and parallelism are kept, passes are added while the target is met.
+    # The first pass also fills the memory, so time isn't proportional to them
+    time_cost = 1
+    while True:
+        hasher.time_cost = time_cost + 1
+        if time_hasher(hasher, repeat) > target:
+            break
+        time_cost += 1
+    return {'time_cost': time_cost, 'memory_cost': hasher.memory_cost, 'parallelism': hasher.parallelism}
+
+CALIBRATORS = {
+    'argon2': (Argon2PasswordHasher, _calibrate_argon2),
+    'pbkdf2_sha256': (PBKDF2PasswordHasher, _calibrate_pbkdf2),
+    'bcrypt_sha256': (BCryptSHA256PasswordHasher, _calibrate_bcrypt),
+}
+
+
+def calibrate_hasher(algorithm, target, repeat=3, **overrides):
+    """
+    Returns the highest work factor of `algorithm` whose hashes take at most
+    `target` seconds on this machine, or its lowest one when none does,
+    along with the time measured for it. `overrides` fix parameters
+    calibration doesn't search, such as the memory cost of Argon2. Raises
+    `ValueError` when the hasher's library isn't installed.
+    """
+    hasher_class, calibrate = CALIBRATORS[algorithm]
+    hasher = hasher_class()
+    for name, value in overrides.items():
+        setattr(hasher, name, value)
+    work_factor = calibrate(hasher, target, repeat)
+
+    for name, value in work_factor.items():
+        setattr(hasher, name, value)
+    return work_factor, time_hasher(hasher, repeat)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from ninja_extra import status
+from ninja_extra.exceptions import APIException
+
+
+PASSWORD_HASHING = getattr(settings, 'PASSWORD_HASHING', {})
+
+WORKERS = PASSWORD_HASHING.get('WORKERS') or min(4, os.cpu_count() or 1)
+
+# Hashers spend their time in C code that releases the GIL, so threads are
+# enough to keep the event loop free. The pool is sized to the CPUs it may use.
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='password-hashing')
+
+# Jobs running or waiting on the pool. Past the limit new ones are turned away
+# instead of queueing behind a burst for longer than clients will wait.
+_slots = threading.BoundedSemaphore(WORKERS + PASSWORD_HASHING.get('MAX_QUEUED', 16))
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many requests are being processed, try again shortly.'
+    default_code = 'unavailable'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        self.wait = wait
+        super().__init__(detail, code)
+
+
+async def run_hashing(func, *args, **kwargs):
+    """
+    Runs the CPU bound `func` on the bounded password hashing pool and
+    returns its result. `func` must not touch the database, the pool's
+    threads have no connection management. Raises `HashingUnavailable`
+    when the pool's queue is full.
+    """
+    if not _slots.acquire(blocking=False):
+        raise HashingUnavailable(wait=PASSWORD_HASHING.get('RETRY_AFTER', 1))
+    try:
+        future = _executor.submit(partial(func, *args, **kwargs))
+    except BaseException:
+        _slots.release()
+        raise
+    # Released once the job is done, even if the request gave up waiting on it
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.wrap_future(future)
+
+async def hash_password(password) -> str:
+    """
+    Returns the encoded hash of `password` for the default hasher, as
+    `make_password` does.
+    """
+    return await run_hashing(make_password, password)
+
+async def check_password_hash(password, encoded) -> tuple:
+    """
+    Returns whether `password` matches `encoded`, and whether the hash should
+    be upgraded to the default hasher's current work factor.
+    """
+    return await run_hashing(verify_password, password, encoded)
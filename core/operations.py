@@ -0,0 +1,16 @@
+from django.db.migrations.operations import AddIndex
+
+
+class AddPostgresIndex(AddIndex):
+    """
+    AddIndex for indexes only PostgreSQL can build (pg_trgm, operator
+    classes). Other databases, such as SQLite test runs, keep the index in
+    the migration state without creating it.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
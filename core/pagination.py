@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Generic, List, Optional, TypeVar
+from uuid import UUID
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+from django.http import HttpResponse
+from ninja import Field, Schema
+from ninja.conf import settings as ninja_settings
+from ninja.pagination import PaginationBase
+from ninja_extra.exceptions import ValidationError
+from core.cache import get_model_versions, make_response_key
+from core.projection import get_response_schema
+from core.query import get_schema_models, optimize_queryset
+from core.renderers import renderer
+from core.serialization import get_values_plan
+
+
+T = TypeVar('T')
+
+
+class CursorPage(Schema, Generic[T]):
+    next_cursor: Optional[str] = None
+    items: List[T]
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def encode_cursor(ordering, values) -> str:
+    # The ordering travels with the values, a cursor only continues the
+    # sort it was taken from
+    payload = json.dumps(
+        [','.join(ordering), *(_encode_value(value) for value in values)],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, ordering) -> list:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != len(ordering) + 1 or values[0] != ','.join(ordering):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    return values[1:]
+
+
+class CursorPagination(PaginationBase):
+    """
+    Keyset pagination over `ordering` plus the primary key as a tie breaker.
+    Instead of an offset, each page continues from the sort key of the
+    previous page's last row, carried in an opaque cursor. Deep pages then
+    cost the same index range scan as the first one.
+
+    An explicit `order_by` on the queryset takes precedence over `ordering`.
+
+    Given the item `schema`, projected by the request's `?fields=` and
+    `?expand=`, pages are built from `.values()` rows and rendered straight
+    to the response, skipping model instances and pydantic validation.
+    Schemas the values path can't reproduce fall back to optimized model
+    querysets.
+
+    With `cache`, rendered pages are kept under the versions of every model
+    the schema reads, so warm requests skip the database and rendering.
+    """
+    class Input(Schema):
+        cursor: Optional[str] = None
+        page_size: int = Field(
+            ninja_settings.PAGINATION_PER_PAGE,
+            ge=1,
+            le=ninja_settings.PAGINATION_MAX_LIMIT
+        )
+
+    class Output(Schema):
+        next_cursor: Optional[str] = None
+        items: List[Any]
+
+    def __init__(self, ordering=('created_at',), schema=None, cache=False, **kwargs):
+        self.ordering = tuple(ordering)
+        self.schema = schema
+        self.cache = cache and getattr(settings, 'RESPONSE_CACHE', {}).get('ENABLED', True)
+        super().__init__(**kwargs)
+
+    def get_ordering(self, queryset: QuerySet) -> tuple:
+        ordering = tuple(queryset.query.order_by) or self.ordering
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and queryset.model._meta.pk.name not in names:
+            descending = ordering[0].startswith('-')
+            ordering += ('-pk' if descending else 'pk',)
+        return ordering
+
+    def get_keyset_filter(self, ordering, values) -> Q:
+        keyset = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        # Bounding the leading column lets the database use an index range scan
+        leading = ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{bound}': values[0]}) & keyset
+
+    def get_cursor(self, item, ordering) -> str:
+        return encode_cursor(ordering, (getattr(item, field.lstrip('-')) for field in ordering))
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params) -> Any:
+        ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+        if pagination.cursor:
+            values = decode_cursor(pagination.cursor, ordering)
+            queryset = queryset.filter(self.get_keyset_filter(ordering, values))
+
+        if self.schema:
+            return self.paginate_schema(queryset, ordering, pagination, params.get('request'))
+
+        page_size = pagination.page_size
+        items = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = self.get_cursor(items[-1], ordering)
+
+        return {'next_cursor': next_cursor, 'items': items}
+
+    def paginate_schema(self, queryset: QuerySet, ordering, pagination: Input, request) -> HttpResponse:
+        # `?fields=` and `?expand=` narrow the schema, and with it the columns read
+        schema = get_response_schema(request, self.schema)
+        if self.cache:
+            version = get_model_versions(get_schema_models(queryset.model, schema))
+            key = make_response_key(request, version)
+            content = cache.get_or_set(
+                key,
+                lambda: self.render_page(queryset, schema, ordering, pagination, request),
+                getattr(settings, 'RESPONSE_CACHE', {}).get('TIMEOUT', 60 * 60 * 24)
+            )
+        else:
+            content = self.render_page(queryset, schema, ordering, pagination, request)
+        return HttpResponse(content, content_type=renderer.get_content_type())
+
+    def render_page(self, queryset: QuerySet, schema, ordering, pagination: Input, request) -> bytes:
+        page_size = pagination.page_size
+        plan = get_values_plan(queryset.model, schema)
+        if plan is None:
+            objs = list(optimize_queryset(queryset, schema)[:page_size + 1])
+            next_cursor = None
+            if len(objs) > page_size:
+                objs = objs[:page_size]
+                next_cursor = self.get_cursor(objs[-1], ordering)
+            items = [schema.model_validate(obj).model_dump() for obj in objs]
+        else:
+            names = [field.lstrip('-') for field in ordering]
+            rows = list(
+                queryset.prefetch_related(None).values(*dict.fromkeys([*plan.columns, *names]))[:page_size + 1]
+            )
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = encode_cursor(ordering, (rows[-1][name] for name in names))
+            items = plan.build(rows)
+
+        return renderer.render(
+            request,
+            {'next_cursor': next_cursor, 'items': items},
+            response_status=200
+        )
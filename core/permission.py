@@ -1,7 +1,21 @@
 from ninja_extra import permissions
+from users.cache import get_user_roles
 
 
-class IsSuperAdmin(permissions.IsAuthenticated):
+class HasGroup(permissions.IsAuthenticated):
+    """
+    Allows access to authenticated users belonging to `group_name`. Group
+    membership is resolved through the roles cache, not a query per check.
+    On async routes `AsyncCustomJWTAuth` resolves it before the check runs.
+    """
+    group_name: str = None
+
     def has_permission(self, request, controller):
-        user = request.user
-        return bool(super().has_permission(request, controller) and user.groups.filter(name='superadmin').exists())
\ No newline at end of file
+        return bool(
+            super().has_permission(request, controller)
+            and self.group_name in get_user_roles(request.user).groups
+        )
+
+
+class IsSuperAdmin(HasGroup):
+    group_name = 'superadmin'
@@ -0,0 +1,151 @@
+from functools import lru_cache
+from types import UnionType
+from typing import FrozenSet, NamedTuple, Optional, Union, get_args, get_origin
+from django.http import HttpResponse
+from ninja import Schema
+from ninja_extra.exceptions import ValidationError
+from pydantic import BaseModel, create_model
+from core.query import get_nested_schema
+from core.renderers import renderer
+
+
+# Nested schemas rendered as their reference schema unless expanded
+REFERENCE_SCHEMAS = {}
+
+
+def register_reference_schema(schema, reference):
+    """
+    Renders objects of `schema` nested in a response as `reference`, a
+    schema with a few of its fields, unless the client expands them.
+    """
+    REFERENCE_SCHEMAS[schema] = reference
+
+
+class Projection(NamedTuple):
+    fields: Optional[FrozenSet[str]] = None
+    expand: FrozenSet[str] = frozenset()
+
+
+class ProjectionError(ValueError):
+    def __init__(self, param, names):
+        self.param = param
+        self.names = names
+        super().__init__(f'Unknown field(s): {", ".join(names)}.')
+
+
+def _parse_paths(value) -> FrozenSet[str]:
+    return frozenset(path.strip() for path in value.split(',') if path.strip())
+
+def get_projection(request) -> Projection:
+    """
+    Reads `?fields=` and `?expand=` from the request. Both are comma separated
+    field names, nested fields are given as `parent.child`.
+    """
+    if request is None:
+        return Projection()
+    fields = request.GET.get('fields')
+    expand = request.GET.get('expand')
+    return Projection(
+        fields=_parse_paths(fields) if fields else None,
+        expand=_parse_paths(expand) if expand else frozenset()
+    )
+
+
+def _subpaths(paths, name) -> FrozenSet[str]:
+    prefix = f'{name}.'
+    return frozenset(path[len(prefix):] for path in paths if path.startswith(prefix))
+
+def _replace_schema(annotation, schema, replacement):
+    # Rebuilds `Optional[schema]`, `List[schema]`... around the replacement
+    if annotation is schema:
+        return replacement
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    args = tuple(_replace_schema(arg, schema, replacement) for arg in args)
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        return Union[args]
+    return origin[args[0] if len(args) == 1 else args]
+
+
+# Fields and expand come from the query string, so the cache is bounded:
+# arbitrary combinations evict each other rather than pile up schemas
+@lru_cache(maxsize=256)
+def project_schema(schema, fields: Optional[FrozenSet[str]] = None, expand: FrozenSet[str] = frozenset(), prefix=''):
+    """
+    Returns `schema` narrowed to `fields` (all of them when None), with the
+    nested schemas that have a reference schema collapsed to it unless their
+    field is in `expand` or one of their own fields is selected. Returns
+    `schema` itself when nothing changes. Raises `ProjectionError` for names
+    the schema doesn't have.
+    """
+    nested = {
+        name for name, field_info in schema.model_fields.items()
+        if get_nested_schema(field_info.annotation) is not None
+    }
+    selected = None if fields is None else {path.split('.', 1)[0] for path in fields}
+    for param, paths in (('fields', fields or ()), ('expand', expand)):
+        unknown = []
+        for path in sorted(paths):
+            # Only nested objects have fields of their own or can be expanded
+            known = nested if '.' in path or param == 'expand' else schema.model_fields
+            if path.split('.', 1)[0] not in known:
+                unknown.append(f'{prefix}{path}')
+        if unknown:
+            raise ProjectionError(param, unknown)
+
+    definitions = {}
+    changed = False
+    for name, field_info in schema.model_fields.items():
+        if selected is not None and name not in selected:
+            changed = True
+            continue
+
+        annotation = field_info.annotation
+        if name in nested:
+            nested_schema = get_nested_schema(annotation)
+            nested_fields = None if fields is None or name in fields else _subpaths(fields, name)
+            nested_expand = _subpaths(expand, name)
+            target = nested_schema
+            if nested_schema in REFERENCE_SCHEMAS and name not in expand and not nested_expand and not nested_fields:
+                target = REFERENCE_SCHEMAS[nested_schema]
+            projected = project_schema(target, nested_fields, nested_expand, f'{prefix}{name}.')
+            if projected is not nested_schema:
+                annotation = _replace_schema(annotation, nested_schema, projected)
+                changed = True
+        definitions[name] = (annotation, field_info)
+
+    if not changed:
+        return schema
+    return create_model(f'{schema.__name__}Projection', __base__=Schema, **definitions)
+
+
+def get_response_schema(request, schema):
+    """
+    Returns `schema` projected by the request's `?fields=` and `?expand=`.
+    Unknown field names are rejected with a `ValidationError`.
+    """
+    projection = get_projection(request)
+    try:
+        return project_schema(schema, projection.fields, projection.expand)
+    except ProjectionError as exc:
+        raise ValidationError({exc.param: str(exc)})
+
+
+def render_response(controller, data, schema) -> HttpResponse:
+    """
+    Serializes `data` with `schema`, as returned by `get_response_schema`,
+    and writes it to the controller's response, keeping the headers and
+    cookies already set on it.
+    """
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    response = controller.context.response
+    response.content = renderer.render(
+        controller.context.request,
+        schema.model_validate(data).model_dump(),
+        response_status=200
+    )
+    response['Content-Type'] = renderer.get_content_type()
+    return response
@@ -0,0 +1,112 @@
+from functools import lru_cache
+from typing import NamedTuple, Tuple, get_args
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from pydantic import BaseModel
+
+
+class QueryPlan(NamedTuple):
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[str, ...] = ()
+    only: Tuple[str, ...] = ()
+
+
+def get_nested_schema(annotation):
+    """
+    Returns the schema wrapped by annotations such as `Optional[Schema]` or
+    `List[Schema]`, or None for a scalar annotation.
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        schema = get_nested_schema(arg)
+        if schema is not None:
+            return schema
+    return None
+
+
+def _plan(model, schema, prefix, plan, joined):
+    # `joined` tells whether `model` is loaded by the main query (the root or
+    # a select_related chain) or by a prefetch query
+    for name, field_info in schema.model_fields.items():
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Properties and methods may read any column, so load them all
+            if joined and hasattr(model, name):
+                plan['restrict_columns'] = False
+            continue
+
+        path = f'{prefix}{name}'
+        nested_schema = get_nested_schema(field_info.annotation)
+
+        if not field.is_relation or nested_schema is None:
+            if joined:
+                plan['only'].append(path)
+        elif joined and not (field.many_to_many or field.one_to_many):
+            plan['select_related'].append(path)
+            plan['only'].append(path)
+            _plan(field.related_model, nested_schema, f'{path}__', plan, joined=True)
+        else:
+            plan['prefetch_related'].append(path)
+            _plan(field.related_model, nested_schema, f'{path}__', plan, joined=False)
+
+    if joined:
+        plan['only'].append(f'{prefix}{model._meta.pk.name}')
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(model, schema) -> QueryPlan:
+    plan = {'select_related': [], 'prefetch_related': [], 'only': [], 'restrict_columns': True}
+    _plan(model, schema, '', plan, joined=True)
+
+    return QueryPlan(
+        select_related=tuple(plan['select_related']),
+        prefetch_related=tuple(plan['prefetch_related']),
+        only=tuple(dict.fromkeys(plan['only'])) if plan['restrict_columns'] else ()
+    )
+
+@lru_cache(maxsize=None)
+def get_schema_models(model, schema) -> Tuple:
+    """
+    Returns `model` and every related model whose rows `schema` renders, in
+    a stable order.
+    """
+    models = {model: None}
+    for name, field_info in schema.model_fields.items():
+        nested_schema = get_nested_schema(field_info.annotation)
+        if nested_schema is None:
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.is_relation:
+            models.update(dict.fromkeys(get_schema_models(field.related_model, nested_schema)))
+    return tuple(models)
+
+def optimize_queryset(queryset: QuerySet, schema) -> QuerySet:
+    """
+    Applies the select_related/prefetch_related/only() that serializing
+    `queryset` with `schema` needs, so a list of N rows costs a constant
+    number of queries.
+    """
+    plan = get_query_plan(queryset.model, schema)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    if plan.only:
+        queryset = queryset.only(*plan.only)
+    return queryset
+
+async def aload_related(obj, schema):
+    """
+    Returns `obj` ready to be serialized with `schema` from async code, where
+    relations can't be loaded lazily: read again with the relations the
+    schema renders, or as it is when it renders none.
+    """
+    plan = get_query_plan(type(obj), schema)
+    if not plan.select_related and not plan.prefetch_related:
+        return obj
+    return await optimize_queryset(type(obj)._default_manager.all(), schema).aget(pk=obj.pk)
@@ -0,0 +1,28 @@
+import orjson
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson. Dates, times, decimals and lazy strings
+    are passed to `NinjaJSONEncoder`, so values render exactly as they do
+    with ninja's default renderer.
+    """
+    media_type = 'application/json'
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def __init__(self):
+        self._encoder = NinjaJSONEncoder()
+
+    def get_content_type(self):
+        return f'{self.media_type}; charset={self.charset}'
+
+    def dumps(self, data) -> bytes:
+        return orjson.dumps(data, default=self._encoder.default, option=self.options)
+
+    def render(self, request, data, *, response_status):
+        return self.dumps(data)
+
+
+renderer = ORJSONRenderer()
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import F
+from core.query import get_nested_schema
+
+
+SCALAR = 'scalar'
+DEFAULT = 'default'
+JOIN = 'join'
+MANY = 'many'
+
+
+class ValuesPlan:
+    """
+    Builds the output of `schema` for `model` from `.values()` rows instead
+    of model instances and pydantic validation. Forward relations and
+    many-to-many fields with a nested schema cost one extra query each for
+    the whole page.
+
+    The output matches `schema.model_dump()` as long as the schema declares
+    each column with the type the database returns, which `get_values_plan`
+    checks as far as it can and otherwise returns None.
+    """
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+        self.pk_column = model._meta.pk.attname
+        self.fields: List[Tuple[str, str, object]] = []
+        self.columns: List[str] = [self.pk_column]
+
+    def add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def fetch(self, pks: Iterable) -> Dict:
+        """
+        Returns the items of the rows with the given primary keys, by primary
+        key and in the model's default ordering.
+        """
+        rows = list(self.model._default_manager.filter(pk__in=pks).values(*self.columns))
+        return {row[self.pk_column]: item for row, item in zip(rows, self.build(rows))}
+
+    def build(self, rows) -> List[dict]:
+        rows = list(rows)
+        related = {}
+        for name, kind, spec in self.fields:
+            if kind == JOIN:
+                column, subplan = spec
+                pks = {row[column] for row in rows if row[column] is not None}
+                related[name] = subplan.fetch(pks) if pks else {}
+            elif kind == MANY:
+                related[name] = self._fetch_many(spec, rows)
+
+        items = []
+        for row in rows:
+            item = {}
+            for name, kind, spec in self.fields:
+                if kind == SCALAR:
+                    item[name] = row[spec]
+                elif kind == DEFAULT:
+                    item[name] = spec()
+                elif kind == JOIN:
+                    item[name] = related[name].get(row[spec[0]])
+                else:
+                    item[name] = related[name].get(row[self.pk_column], [])
+            items.append(item)
+        return items
+
+    def _fetch_many(self, spec, rows) -> Dict:
+        field, subplan = spec
+        pks = [row[self.pk_column] for row in rows]
+        if not pks:
+            return {}
+
+        # A single join through the m2m table, in the related model's
+        # ordering as a prefetch would
+        query_name = field.related_query_name()
+        related_rows = list(
+            subplan.model._default_manager
+            .filter(**{f'{query_name}__in': pks})
+            .values(*subplan.columns, _source=F(query_name))
+        )
+        related = defaultdict(list)
+        for row, item in zip(related_rows, subplan.build(related_rows)):
+            related[row['_source']].append(item)
+        return related
+
+
+def _get_default_factory(field_info):
+    if field_info.default_factory is not None:
+        return field_info.default_factory
+    default = field_info.default
+    if isinstance(default, (list, dict, set)):
+        return lambda: type(default)(default)
+    return lambda: default
+
+
+def _is_plain_schema(schema) -> bool:
+    # Resolvers and validators can change values, only the pydantic path
+    # knows how to run them
+    decorators = schema.__pydantic_decorators__
+    if getattr(schema, '_ninja_resolvers', None):
+        return False
+    if decorators.field_validators or decorators.field_serializers or decorators.model_serializers:
+        return False
+    return all(name == '_run_root_validator' for name in decorators.model_validators)
+
+
+def _build_plan(model, schema) -> Optional[ValuesPlan]:
+    if not _is_plain_schema(schema):
+        return None
+
+    plan = ValuesPlan(model, schema)
+    for name, field_info in schema.model_fields.items():
+        if field_info.alias and field_info.alias != name:
+            return None
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Attributes of the model only exist on instances
+            if hasattr(model, name) or field_info.is_required():
+                return None
+            plan.fields.append((name, DEFAULT, _get_default_factory(field_info)))
+            continue
+
+        nested_schema = get_nested_schema(field_info.annotation)
+        if isinstance(field, models.FileField) or not field.concrete:
+            return None
+        if not field.is_relation:
+            plan.add_column(field.attname)
+            plan.fields.append((name, SCALAR, field.attname))
+        elif field.many_to_many:
+            subplan = get_values_plan(field.related_model, nested_schema) if nested_schema else None
+            if subplan is None:
+                return None
+            plan.fields.append((name, MANY, (field, subplan)))
+        elif nested_schema is None:
+            return None
+        else:
+            subplan = get_values_plan(field.related_model, nested_schema)
+            if subplan is None:
+                return None
+            plan.add_column(field.attname)
+            plan.fields.append((name, JOIN, (field.attname, subplan)))
+    return plan
+
+
+@lru_cache(maxsize=None)
+def get_values_plan(model, schema) -> Optional[ValuesPlan]:
+    """
+    Returns the values plan of `schema` for `model`, or None when the schema
+    needs model instances (resolvers, validators, properties, reverse
+    relations, files).
+    """
+    return _build_plan(model, schema)
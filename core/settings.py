@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third-party apps
     'corsheaders',
     'ninja_extra',
@@ -108,6 +109,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New and upgraded hashes use the first hasher, the others still verify old ones.
+# Work factors are set in PASSWORD_HASHING['WORK_FACTORS']
+PASSWORD_HASHERS = [
+    'core.hashers.Argon2PasswordHasher',
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'core.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -159,8 +170,159 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 #     ]
 #     MANAGERS=ADMINS
 
+NINJA_PAGINATION_PER_PAGE = 50
+
+NINJA_PAGINATION_MAX_LIMIT = 200
+
 NINJA_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
     # 'SIGNING_KEY': getenv('SECRET_KEY'),
 }
+
+AUTH_USER_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    # Embed group names and permission codenames in issued access tokens
+    'ROLE_CLAIMS': False,
+}
+
+ACCOUNT_TOKENS = {
+    # Lifetime in seconds of verify-account and password-reset tokens
+    'MAX_AGE': 60 * 60 * 24 * 3,
+    # Bcrypt tokens issued before the switch to signed tokens are accepted
+    # until this date
+    'LEGACY_BCRYPT_UNTIL': getenv('ACCOUNT_TOKENS_LEGACY_BCRYPT_UNTIL', '2026-11-18'),
+}
+
+EMAIL_OUTBOX = {
+    'ENABLED': True,
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    # Seconds before the first retry, doubled on every further attempt
+    'RETRY_BACKOFF': 30,
+    # Seconds claimed emails are kept from other workers while being sent
+    'CLAIM_TIMEOUT': 300,
+    'POLL_INTERVAL': 5,
+}
+
+TOKEN_BLACKLIST = {
+    # Trust the in-process blacklist filter when it doesn't hold a refresh
+    # token, rather than querying the database on every refresh. Processes
+    # learn of new entries through a version kept in the default cache, which
+    # must be shared by all of them: the file-based cache only is by the
+    # processes of one host. Deployments on several hosts need the Redis
+    # backend (see CACHES) or this turned off. A process-local cache turns
+    # it off by itself
+    'FILTER': True,
+}
+
+TOKEN_PRUNING = {
+    'BATCH_SIZE': 1000,
+    # Seconds to pause between batches
+    'SLEEP': 0.1,
+    # Seconds between in-process pruning runs, None leaves it to `manage.py prune_tokens`.
+    # Runs are spread over processes through a lock in the default cache: with
+    # the file-based cache every host prunes, and a process-local cache would
+    # have every worker prune
+    'INTERVAL': None,
+}
+
+EXPORT = {
+    # Rows read from the database per round trip while streaming exports
+    'CHUNK_SIZE': 2000,
+}
+
+BULK_OPERATIONS = {
+    # Largest number of rows a single bulk request may carry
+    'MAX_ITEMS': 5000,
+    'BATCH_SIZE': 500,
+}
+
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    # Seconds a rendered reference list is kept, changes invalidate it sooner
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+USER_SEARCH = {
+    'DEFAULT_LIMIT': 10,
+    # Largest `limit` a directory search accepts
+    'MAX_LIMIT': 50,
+}
+
+PASSWORD_HASHING = {
+    # Threads hashing and checking passwords for async views, defaults to
+    # the number of CPUs up to 4
+    'WORKERS': None,
+    # Jobs allowed to wait for a thread, further requests get a 503
+    'MAX_QUEUED': 16,
+    # Seconds sent in the Retry-After header of those 503s
+    'RETRY_AFTER': 1,
+    # Time `manage.py calibrate_hashers` aims for per hash, in seconds
+    'TARGET_TIME': 0.25,
+    # Costs of the core.hashers hashers, as printed by `manage.py calibrate_hashers`.
+    # Every running Argon2 hash holds memory_cost KiB, times WORKERS at most
+    'WORK_FACTORS': {
+        'argon2': {'time_cost': 2, 'memory_cost': 102400, 'parallelism': 8},
+        'pbkdf2_sha256': {'iterations': 870000},
+        'bcrypt_sha256': {'rounds': 12},
+    },
+}
+
+THROTTLING = {
+    # Where token buckets are kept, 'local' to each process or 'cache' to share them
+    'BACKEND': 'local',
+    # Cache holding the buckets of the 'cache' backend
+    'CACHE_ALIAS': 'default',
+    # Buckets a process keeps with the 'local' backend
+    'MAX_KEYS': 10000,
+    # Bucket size and refill per period of each scope, as "count/period"
+    'RATES': {
+        'login_client': '20/m',
+        'login_account': '5/m',
+        'forgot_password_client': '10/h',
+        'forgot_password_account': '3/h',
+        'account_token_client': '10/m',
+        'account_token_account': '5/m',
+    },
+}
+
+# The default cache keeps versioned entries in each process in front of the
+# shared cache. Set CACHE_BACKEND and CACHE_LOCATION to share it through Redis
+# (django.core.cache.backends.redis.RedisCache, needs redis-py) instead of files.
+# Files are only shared by the processes of one host, deployments on several
+# hosts need Redis for invalidations and locks to reach every process. Locks
+# taken in the file-based cache aren't atomic either, they only make it rare
+# for two processes to compute the same value or run the same periodic task
+SHARED_CACHE_BACKEND = getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'utils.cache.TieredCache',
+        'LOCATION': 'default',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            # Only keys holding immutable, versioned data are kept in process
+            'LOCAL_PREFIXES': [
+                'users:auth-snapshot:',
+                'users:roles:',
+                'bootstrap:',
+                'responses:',
+            ],
+            'LOCAL_MAX_ENTRIES': 4096,
+            # Seconds an entry is kept in process at most
+            'LOCAL_TIMEOUT': 300,
+            # Seconds other callers wait on a value being computed by `get_or_set`
+            'LOCK_TIMEOUT': 10,
+        },
+    },
+    'shared': {
+        'BACKEND': SHARED_CACHE_BACKEND,
+        'LOCATION': getenv('CACHE_LOCATION', '/var/tmp/django-saas-cache'),
+        'TIMEOUT': 300,
+        # Files are culled past this many entries
+        'OPTIONS': {'MAX_ENTRIES': 10000} if SHARED_CACHE_BACKEND.endswith('FileBasedCache') else {},
+    },
+}
@@ -0,0 +1,162 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from ninja.throttling import BaseThrottle
+
+
+THROTTLING = getattr(settings, 'THROTTLING', {})
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+class Bucket(NamedTuple):
+    tokens: float
+    updated_at: float
+
+
+class LocalBucketStore:
+    """
+    Buckets kept in process memory, the least recently used ones are dropped
+    past `max_keys`. Limits apply per worker process.
+    """
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or THROTTLING.get('MAX_KEYS', 10000)
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now) -> float:
+        with self.lock:
+            bucket = self.buckets.pop(key, None)
+            bucket, wait = _take_token(bucket, capacity, refill_rate, now)
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return wait
+
+
+class CacheBucketStore:
+    """
+    Buckets kept in a Django cache, shared by every process using it. Reads
+    and writes aren't atomic, so concurrent requests for a key may each take
+    the same token.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or THROTTLING.get('CACHE_ALIAS', 'default')]
+
+    def take(self, key, capacity, refill_rate, now) -> float:
+        cached = self.cache.get(f'throttle:{key}')
+        bucket, wait = _take_token(Bucket(*cached) if cached else None, capacity, refill_rate, now)
+        # A bucket left alone for capacity / refill_rate seconds is full again
+        self.cache.set(f'throttle:{key}', tuple(bucket), timeout=int(capacity / refill_rate) + 1)
+        return wait
+
+
+def _take_token(bucket, capacity, refill_rate, now):
+    # Returns the bucket once refilled and drawn from, and the seconds until
+    # it holds a token when it had none to give
+    if bucket is None:
+        tokens = capacity
+    else:
+        # A host whose clock lags the last writer's refills nothing
+        tokens = min(capacity, bucket.tokens + max(0.0, now - bucket.updated_at) * refill_rate)
+    if tokens >= 1:
+        return Bucket(tokens - 1, now), 0.0
+    return Bucket(tokens, now), (1 - tokens) / refill_rate
+
+
+STORES = {
+    'local': LocalBucketStore,
+    'cache': CacheBucketStore,
+}
+
+_store = None
+
+def get_bucket_store():
+    """
+    Returns the store of `THROTTLING['BACKEND']`, 'local' by default.
+    """
+    global _store
+    if _store is None:
+        _store = STORES[THROTTLING.get('BACKEND', 'local')]()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle for routes, used with ninja-extra's `@throttle`
+    decorator. Every key gets a bucket holding up to N tokens, refilled at
+    N per period, for a rate of `N/period` (`5/m`, `100/h`...) read from
+    `THROTTLING['RATES'][scope]`. A request takes a token and is throttled
+    when none is left.
+
+    Throttles run before the request body is parsed or the view is called.
+    Subclasses return the key to throttle on from `get_key`, or None to let
+    the request through.
+    """
+    scope: Optional[str] = None
+
+    def __init__(self, scope=None, rate=None):
+        self.scope = scope or self.scope
+        rate = rate or THROTTLING.get('RATES', {}).get(self.scope)
+        if not rate:
+            raise ImproperlyConfigured(f'No throttle rate set for the "{self.scope}" scope.')
+        self.capacity, self.refill_rate = self.parse_rate(rate)
+        self.wait_time = None
+
+    @staticmethod
+    def parse_rate(rate):
+        count, period = rate.split('/')
+        return int(count), int(count) / PERIODS[period[0]]
+
+    def get_key(self, request) -> Optional[str]:
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request) -> bool:
+        key = self.get_key(request)
+        if key is None:
+            return True
+        # Buckets in a shared cache are refilled by every host, so they are
+        # stamped with the wall clock, monotonic clocks differ between hosts
+        self.wait_time = get_bucket_store().take(f'{self.scope}:{key}', self.capacity, self.refill_rate, time.time())
+        return not self.wait_time
+
+    def wait(self) -> Optional[float]:
+        return self.wait_time
+
+
+class ClientThrottle(TokenBucketThrottle):
+    """
+    Throttles requests by client IP, see `NINJA_NUM_PROXIES`.
+    """
+
+    def get_key(self, request) -> Optional[str]:
+        return self.get_ident(request)
+
+
+class AccountThrottle(TokenBucketThrottle):
+    """
+    Throttles requests by the account they target, the `field` of their JSON
+    body such as an email or user id. Requests without it are let through.
+    """
+
+    def __init__(self, field, scope=None, rate=None):
+        self.field = field
+        super().__init__(scope, rate)
+
+    def get_key(self, request) -> Optional[str]:
+        try:
+            value = orjson.loads(request.body).get(self.field)
+        except (orjson.JSONDecodeError, AttributeError):
+            return None
+        if not isinstance(value, str) or not value.strip():
+            return None
+        # Keys don't carry the emails themselves
+        return hashlib.md5(value.strip().lower().encode()).hexdigest()
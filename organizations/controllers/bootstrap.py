@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from ninja_extra import api_controller, route
+from core.conditional import conditional
+from core.controllers import AsyncControllerBase
+from core.permission import IsSuperAdmin
+from core.projection import get_projection
+from core.renderers import renderer
+from organizations.services import aget_collection_versions, combine_versions, render_bootstrap
+
+
+async def _get_bootstrap_etag(request, since=None):
+    version = combine_versions(await aget_collection_versions())
+    expand = ','.join(sorted(get_projection(request).expand))
+    return hashlib.md5(f'{version}:{since}:{expand}'.encode()).hexdigest()
+
+
+@api_controller('bootstrap', tags=['Bootstrap'], permissions=[IsSuperAdmin])
+class BootstrapController(AsyncControllerBase):
+
+    @route.get('/')
+    @conditional(etag=_get_bootstrap_etag)
+    async def get_bootstrap(self, since: Optional[str] = None):
+        """
+        Returns every organization reference collection with its version.
+        Pass the `version` of an earlier response as `since` to only get the
+        collections that changed since. `?expand=` applies to every
+        collection with the field, `?fields=` isn't supported here.
+        """
+        expand = get_projection(self.context.request).expand
+        content = await sync_to_async(render_bootstrap)(since, expand)
+        return HttpResponse(content, content_type=renderer.get_content_type())
@@ -1,32 +1,33 @@
-import logging
-from typing import List
-from django.db.utils import Error
-from ninja import PatchDict
-from ninja_extra import api_controller, route, ControllerBase
-from ninja_extra.exceptions import ValidationError
+from ninja import PatchDict, Query
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
+from core.conditional import aversions_etag, conditional
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from organizations.controllers.reference import reference_data_controller
 from organizations.models import Department
-from organizations.schemas import DepartmentInputSchema, DepartmentResponse
+from organizations.schemas import DepartmentFilterSchema, DepartmentInputSchema, DepartmentResponse
 
 
 @api_controller('departments', tags=['Department'], permissions=[IsSuperAdmin])
-class DepartmentController(ControllerBase):
+class DepartmentController(reference_data_controller(
+    Department,
+    DepartmentInputSchema,
+    DepartmentResponse,
+    label='Department',
+    path='departments'
+)):
 
-    def _get_department_or_404(self, id: str) -> Department:
-        department = self.get_object_or_exception(Department, error_message="Department does not exist.", pk=id)
+    async def _get_department_or_404(self, id: str) -> Department:
+        department = await self.aget_object_or_exception(Department, error_message="Department does not exist.", pk=id)
         return department
 
-    def _handle_exception(self, exc):
-        if isinstance(exc, Error):
-            logging.exception(exc)
-            error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
-            raise ValidationError(error_details, 422)
-        raise exc
-    
     @route.post('/create')
-    def create_department(self, payload: DepartmentInputSchema):
+    async def create_department(self, payload: DepartmentInputSchema):
         try:
-            department = Department.objects.create(**payload.model_dump())
+            department = await Department.objects.acreate(**self.to_model_values(payload.model_dump()))
             message = {
                 'status': 'success',
                 'message': f'Department with id "{department.id}" created successfully.',
@@ -36,32 +37,43 @@ class DepartmentController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
     
-    @route.get('/', response=List[DepartmentResponse])
-    def get_all_departments(self):
-        departments = Department.objects.all()
+    @route.get('/', response=CursorPage[DepartmentResponse])
+    @conditional(etag=aversions_etag(Department, DepartmentResponse))
+    @paginate(CursorPagination, ordering=('created_at',), schema=DepartmentResponse, cache=True)
+    async def get_all_departments(self, filters: DepartmentFilterSchema = Query(...)):
+        departments = filters.filter(Department.objects.all())
         return departments
     
     @route.patch('update/{id}', response=DepartmentResponse)
-    def update_department(self, id: str, payload: PatchDict[DepartmentInputSchema]):
+    async def update_department(self, id: str, payload: PatchDict[DepartmentInputSchema]):
         try:
-            department = self._get_department_or_404(id)
-            for attr, value in payload.items():
+            department = await self._get_department_or_404(id)
+            for attr, value in self.to_model_values(payload).items():
                 setattr(department, attr, value)
-            department.save()
-            return department
+            await department.asave()
+
+            schema = get_response_schema(self.context.request, DepartmentResponse)
+            department = await aload_related(department, schema)
+            return render_response(self, department, schema)
         except Exception as exc:
             self._handle_exception(exc)
     
     @route.get('/{id}', response=DepartmentResponse)
-    def get_department(self, id: str):
-        department = self._get_department_or_404(id)
-        return department
+    @conditional(etag=aversions_etag(Department, DepartmentResponse))
+    async def get_department(self, id: str):
+        schema = get_response_schema(self.context.request, DepartmentResponse)
+        department = await self.aget_object_or_exception(
+            optimize_queryset(Department.objects.all(), schema),
+            error_message="Department does not exist.",
+            pk=id
+        )
+        return render_response(self, department, schema)
     
     @route.delete('/{id}')
-    def delete_department(self, id: str):
+    async def delete_department(self, id: str):
         try:
-            department = self._get_department_or_404(id)
-            department.delete()
+            department = await self._get_department_or_404(id)
+            await department.adelete()
             return self.create_response(
                 message={'message': 'Department successfully deleted.'},
                 status_code=200
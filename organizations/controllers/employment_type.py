@@ -1,32 +1,33 @@
-import logging
-from typing import List
-from django.db.utils import Error
-from ninja import PatchDict
-from ninja_extra import api_controller, route, ControllerBase
-from ninja_extra.exceptions import ValidationError
+from ninja import PatchDict, Query
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
+from core.conditional import aversions_etag, conditional
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from organizations.controllers.reference import reference_data_controller
 from organizations.models import EmploymentType
-from organizations.schemas import EmploymentTypeInputSchema, EmploymentTypeResponse
+from organizations.schemas import EmploymentTypeFilterSchema, EmploymentTypeInputSchema, EmploymentTypeResponse
 
 
 @api_controller('employment-types', tags=['Employment Type'], permissions=[IsSuperAdmin])
-class EmploymentTypeController(ControllerBase):
+class EmploymentTypeController(reference_data_controller(
+    EmploymentType,
+    EmploymentTypeInputSchema,
+    EmploymentTypeResponse,
+    label='Employment Type',
+    path='employment-types'
+)):
 
-    def _get_employment_type_or_404(self, id: str) -> EmploymentType:
-        employment_type = self.get_object_or_exception(EmploymentType, error_message="Employment Type does not exist.", pk=id)
+    async def _get_employment_type_or_404(self, id: str) -> EmploymentType:
+        employment_type = await self.aget_object_or_exception(EmploymentType, error_message="Employment Type does not exist.", pk=id)
         return employment_type
 
-    def _handle_exception(self, exc):
-        if isinstance(exc, Error):
-            logging.exception(exc)
-            error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
-            raise ValidationError(error_details, 422)
-        raise exc
-    
     @route.post('/create')
-    def create_employment_type(self, payload: EmploymentTypeInputSchema):
+    async def create_employment_type(self, payload: EmploymentTypeInputSchema):
         try:
-            employment_type = EmploymentType.objects.create(**payload.model_dump())
+            employment_type = await EmploymentType.objects.acreate(**self.to_model_values(payload.model_dump()))
             message = {
                 'status': 'success',
                 'message': f'Employment Type with id "{employment_type.id}" created successfully.',
@@ -36,32 +37,43 @@ class EmploymentTypeController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
     
-    @route.get('/', response=List[EmploymentTypeResponse])
-    def get_all_employment_types(self):
-        employment_types = EmploymentType.objects.all()
+    @route.get('/', response=CursorPage[EmploymentTypeResponse])
+    @conditional(etag=aversions_etag(EmploymentType, EmploymentTypeResponse))
+    @paginate(CursorPagination, ordering=('created_at',), schema=EmploymentTypeResponse, cache=True)
+    async def get_all_employment_types(self, filters: EmploymentTypeFilterSchema = Query(...)):
+        employment_types = filters.filter(EmploymentType.objects.all())
         return employment_types
     
     @route.patch('update/{id}', response=EmploymentTypeResponse)
-    def update_employment_type(self, id: str, payload: PatchDict[EmploymentTypeInputSchema]):
+    async def update_employment_type(self, id: str, payload: PatchDict[EmploymentTypeInputSchema]):
         try:
-            employment_type = self._get_employment_type_or_404(id)
-            for attr, value in payload.items():
+            employment_type = await self._get_employment_type_or_404(id)
+            for attr, value in self.to_model_values(payload).items():
                 setattr(employment_type, attr, value)
-            employment_type.save()
-            return employment_type
+            await employment_type.asave()
+
+            schema = get_response_schema(self.context.request, EmploymentTypeResponse)
+            employment_type = await aload_related(employment_type, schema)
+            return render_response(self, employment_type, schema)
         except Exception as exc:
             self._handle_exception(exc)
 
     @route.get('/{id}', response=EmploymentTypeResponse)
-    def get_employment_type(self, id: str):
-        employment_type = self._get_employment_type_or_404(id)
-        return employment_type
+    @conditional(etag=aversions_etag(EmploymentType, EmploymentTypeResponse))
+    async def get_employment_type(self, id: str):
+        schema = get_response_schema(self.context.request, EmploymentTypeResponse)
+        employment_type = await self.aget_object_or_exception(
+            optimize_queryset(EmploymentType.objects.all(), schema),
+            error_message="Employment Type does not exist.",
+            pk=id
+        )
+        return render_response(self, employment_type, schema)
     
     @route.delete('/{id}')
-    def delete_employment_type(self, id: str):
+    async def delete_employment_type(self, id: str):
         try:
-            employment_type = self._get_employment_type_or_404(id)
-            employment_type.delete()
+            employment_type = await self._get_employment_type_or_404(id)
+            await employment_type.adelete()
             return self.create_response(
                 message={'message': 'Employment Type successfully deleted.'},
                 status_code=200
@@ -1,32 +1,41 @@
-import logging
-from typing import List
-from django.db.utils import Error
-from ninja import PatchDict
-from ninja_extra import api_controller, route, ControllerBase
-from ninja_extra.exceptions import ValidationError
+from ninja import PatchDict, Query
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
+from core.conditional import aversions_etag, conditional
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from organizations.controllers.reference import reference_data_controller
 from organizations.models import JobLevel
-from organizations.schemas import JobLevelInSchema, JobLevelResponse
+from organizations.schemas import JobLevelFilterSchema, JobLevelInSchema, JobLevelResponse
+
+
+# The payload names the leave fields `*_leave_days`, the model `*_leave`
+LEAVE_FIELDS = {
+    f'{leave}_leave_days': f'{leave}_leave'
+    for leave in ('annual', 'study', 'casual', 'maternity', 'paternity')
+}
 
 
 @api_controller('job-levels', tags=['Job Level'], permissions=[IsSuperAdmin])
-class JobLevelController(ControllerBase):
+class JobLevelController(reference_data_controller(
+    JobLevel,
+    JobLevelInSchema,
+    JobLevelResponse,
+    label='Job Level',
+    path='job-levels',
+    field_names=LEAVE_FIELDS
+)):
 
-    def _get_job_level_or_404(self, id: str) -> JobLevel:
-        job_level = self.get_object_or_exception(JobLevel, error_message="Job Level does not exist.", pk=id)
+    async def _get_job_level_or_404(self, id: str) -> JobLevel:
+        job_level = await self.aget_object_or_exception(JobLevel, error_message="Job Level does not exist.", pk=id)
         return job_level
 
-    def _handle_exception(self, exc):
-        if isinstance(exc, Error):
-            logging.exception(exc)
-            error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
-            raise ValidationError(error_details, 422)
-        raise exc
-    
     @route.post('/create')
-    def create_job_level(self, payload: JobLevelInSchema):
+    async def create_job_level(self, payload: JobLevelInSchema):
         try:
-            job_level = JobLevel.objects.create(**payload.model_dump())
+            job_level = await JobLevel.objects.acreate(**self.to_model_values(payload.model_dump()))
             message = {
                 'status': 'success',
                 'message': f'Job Level with id "{job_level.id}" created successfully.',
@@ -36,32 +45,43 @@ class JobLevelController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
     
-    @route.get('/', response=List[JobLevelResponse])
-    def get_all_job_levels(self):
-        job_levels = JobLevel.objects.all()
+    @route.get('/', response=CursorPage[JobLevelResponse])
+    @conditional(etag=aversions_etag(JobLevel, JobLevelResponse))
+    @paginate(CursorPagination, ordering=('created_at',), schema=JobLevelResponse, cache=True)
+    async def get_all_job_levels(self, filters: JobLevelFilterSchema = Query(...)):
+        job_levels = filters.filter(JobLevel.objects.all())
         return job_levels
     
     @route.patch('update/{id}', response=JobLevelResponse)
-    def update_job_level(self, id: str, payload: PatchDict[JobLevelInSchema]):
+    async def update_job_level(self, id: str, payload: PatchDict[JobLevelInSchema]):
         try:
-            job_level = self._get_job_level_or_404(id)
-            for attr, value in payload.items():
+            job_level = await self._get_job_level_or_404(id)
+            for attr, value in self.to_model_values(payload).items():
                 setattr(job_level, attr, value)
-            job_level.save()
-            return job_level
+            await job_level.asave()
+
+            schema = get_response_schema(self.context.request, JobLevelResponse)
+            job_level = await aload_related(job_level, schema)
+            return render_response(self, job_level, schema)
         except Exception as exc:
             self._handle_exception(exc)
 
     @route.get('/{id}', response=JobLevelResponse)
-    def get_job_level(self, id: str):
-        job_level = self._get_job_level_or_404(id)
-        return job_level
+    @conditional(etag=aversions_etag(JobLevel, JobLevelResponse))
+    async def get_job_level(self, id: str):
+        schema = get_response_schema(self.context.request, JobLevelResponse)
+        job_level = await self.aget_object_or_exception(
+            optimize_queryset(JobLevel.objects.all(), schema),
+            error_message="Job Level does not exist.",
+            pk=id
+        )
+        return render_response(self, job_level, schema)
     
     @route.delete('/{id}')
-    def delete_job_level(self, id: str):
+    async def delete_job_level(self, id: str):
         try:
-            job_level = self._get_job_level_or_404(id)
-            job_level.delete()
+            job_level = await self._get_job_level_or_404(id)
+            await job_level.adelete()
             return self.create_response(
                 message={'message': 'Job Level successfully deleted.'},
                 status_code=200
@@ -1,32 +1,33 @@
-import logging
-from typing import List
-from django.db.utils import Error
-from ninja import PatchDict
-from ninja_extra import api_controller, route, ControllerBase
-from ninja_extra.exceptions import ValidationError
+from ninja import PatchDict, Query
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
+from core.conditional import aversions_etag, conditional
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from organizations.controllers.reference import reference_data_controller
 from organizations.models import JobTitle
-from organizations.schemas import JobTitleInputSchema, JobTitleResponse
+from organizations.schemas import JobTitleFilterSchema, JobTitleInputSchema, JobTitleResponse
 
 
 @api_controller('job-titles', tags=['Job Title'], permissions=[IsSuperAdmin])
-class JobTitleController(ControllerBase):
+class JobTitleController(reference_data_controller(
+    JobTitle,
+    JobTitleInputSchema,
+    JobTitleResponse,
+    label='Job Title',
+    path='job-titles'
+)):
 
-    def _get_job_title_or_404(self, id: str) -> JobTitle:
-        job_title = self.get_object_or_exception(JobTitle, error_message="Job Title does not exist.", pk=id)
+    async def _get_job_title_or_404(self, id: str) -> JobTitle:
+        job_title = await self.aget_object_or_exception(JobTitle, error_message="Job Title does not exist.", pk=id)
         return job_title
 
-    def _handle_exception(self, exc):
-        if isinstance(exc, Error):
-            logging.exception(exc)
-            error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
-            raise ValidationError(error_details, 422)
-        raise exc
-    
     @route.post('/create')
-    def create_job_title(self, payload: JobTitleInputSchema):
+    async def create_job_title(self, payload: JobTitleInputSchema):
         try:
-            job_title = JobTitle.objects.create(**payload.model_dump())
+            job_title = await JobTitle.objects.acreate(**self.to_model_values(payload.model_dump()))
             message = {
                 'status': 'success',
                 'message': f'Job Title with id "{job_title.id}" created successfully.',
@@ -36,32 +37,43 @@ class JobTitleController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
     
-    @route.get('/', response=List[JobTitleResponse])
-    def get_all_job_titles(self):
-        job_titles = JobTitle.objects.all()
+    @route.get('/', response=CursorPage[JobTitleResponse])
+    @conditional(etag=aversions_etag(JobTitle, JobTitleResponse))
+    @paginate(CursorPagination, ordering=('created_at',), schema=JobTitleResponse, cache=True)
+    async def get_all_job_titles(self, filters: JobTitleFilterSchema = Query(...)):
+        job_titles = filters.filter(JobTitle.objects.all())
         return job_titles
     
     @route.patch('update/{id}', response=JobTitleResponse)
-    def update_job_title(self, id: str, payload: PatchDict[JobTitleInputSchema]):
+    async def update_job_title(self, id: str, payload: PatchDict[JobTitleInputSchema]):
         try:
-            job_title = self._get_job_title_or_404(id)
-            for attr, value in payload.items():
+            job_title = await self._get_job_title_or_404(id)
+            for attr, value in self.to_model_values(payload).items():
                 setattr(job_title, attr, value)
-            job_title.save()
-            return job_title
+            await job_title.asave()
+
+            schema = get_response_schema(self.context.request, JobTitleResponse)
+            job_title = await aload_related(job_title, schema)
+            return render_response(self, job_title, schema)
         except Exception as exc:
             self._handle_exception(exc)
 
     @route.get('/{id}', response=JobTitleResponse)
-    def get_job_title(self, id: str):
-        job_title = self._get_job_title_or_404(id)
-        return job_title
+    @conditional(etag=aversions_etag(JobTitle, JobTitleResponse))
+    async def get_job_title(self, id: str):
+        schema = get_response_schema(self.context.request, JobTitleResponse)
+        job_title = await self.aget_object_or_exception(
+            optimize_queryset(JobTitle.objects.all(), schema),
+            error_message="Job Title does not exist.",
+            pk=id
+        )
+        return render_response(self, job_title, schema)
     
     @route.delete('/{id}')
-    def delete_job_title(self, id: str):
+    async def delete_job_title(self, id: str):
         try:
-            job_title = self._get_job_title_or_404(id)
-            job_title.delete()
+            job_title = await self._get_job_title_or_404(id)
+            await job_title.adelete()
             return self.create_response(
                 message={'message': 'Job Title successfully deleted.'},
                 status_code=200
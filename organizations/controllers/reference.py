@@ -0,0 +1,145 @@
+import logging
+from typing import Dict, List, Optional
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.utils import Error
+from ninja import File
+from ninja.files import UploadedFile
+from ninja_extra import route
+from ninja_extra.exceptions import ValidationError
+from core.bulk import BulkDeleteInput, BulkOperation, BulkPatch
+from core.controllers import AsyncControllerBase
+from core.export import ExportFormat, export_response
+from core.projection import get_response_schema
+from organizations.services import ReferenceDataImporter, read_csv
+
+
+def _named(name):
+    # Operation ids and url names are derived from the view's name
+    def decorator(func):
+        func.__name__ = func.__qualname__ = name
+        return func
+    return decorator
+
+
+def reference_data_controller(
+    model,
+    input_schema,
+    response_schema,
+    *,
+    label: str,
+    path: str,
+    field_names: Optional[Dict[str, str]] = None
+):
+    """
+    Returns a controller base with the bulk create, update and delete,
+    CSV import and export routes of a reference model. `label` names the
+    model in messages and `path` is the controller's URL prefix, which also
+    names the export file and the routes. `field_names` maps payload names
+    that differ from the model's, as for `BulkOperation`.
+
+    A new class is built for every controller, ninja-extra binds route
+    functions to the controller they are registered on.
+    """
+    name = path.replace('-', '_')
+
+    class ReferenceDataController(AsyncControllerBase):
+
+        def _handle_exception(self, exc):
+            if isinstance(exc, Error):
+                logging.exception(exc)
+                error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
+                raise ValidationError(error_details, 422)
+            raise exc
+
+        def to_model_values(self, data: dict) -> dict:
+            # Single writes map the payload like the bulk ones, foreign keys included
+            return BulkOperation(model, field_names=field_names).to_model_values(data)
+
+        @route.post('/bulk')
+        @_named(f'bulk_create_{name}')
+        async def bulk_create(self, payload: List[input_schema]):
+            try:
+                objs = await sync_to_async(BulkOperation(model, field_names=field_names).create)(
+                    [item.model_dump() for item in payload]
+                )
+            except Exception as exc:
+                self._handle_exception(exc)
+
+            return self.create_response(
+                message={
+                    'status': 'success',
+                    'message': f'{len(objs)} {label}(s) created successfully.',
+                    'data': [str(obj.id) for obj in objs]
+                },
+                status_code=200
+            )
+
+        @route.patch('/bulk')
+        @_named(f'bulk_update_{name}')
+        async def bulk_update(self, payload: List[BulkPatch[input_schema]]):
+            try:
+                objs = await sync_to_async(BulkOperation(model, field_names=field_names).update)(
+                    [item.model_dump(exclude_unset=True) for item in payload]
+                )
+            except Exception as exc:
+                self._handle_exception(exc)
+
+            return self.create_response(
+                message={
+                    'status': 'success',
+                    'message': f'{len(objs)} {label}(s) updated successfully.',
+                    'data': [str(obj.id) for obj in objs]
+                },
+                status_code=200
+            )
+
+        @route.post('/bulk/delete')
+        @_named(f'bulk_delete_{name}')
+        async def bulk_delete(self, payload: BulkDeleteInput):
+            try:
+                ids = await sync_to_async(BulkOperation(model, field_names=field_names).delete)(payload.ids)
+            except Exception as exc:
+                self._handle_exception(exc)
+
+            return self.create_response(
+                message={
+                    'status': 'success',
+                    'message': f'{len(ids)} {label}(s) successfully deleted.',
+                    'data': [str(id) for id in ids]
+                },
+                status_code=200
+            )
+
+        @route.post('/import')
+        @_named(f'import_{name}')
+        async def import_rows(self, file: UploadedFile = File(...)):
+            try:
+                result = await sync_to_async(ReferenceDataImporter(model).run)(read_csv(file.file))
+            except DjangoValidationError as exc:
+                raise ValidationError({'file': ' '.join(exc.messages)})
+            except UnicodeDecodeError:
+                raise ValidationError({'file': 'The file is not a valid UTF-8 CSV file.'})
+            except Exception as exc:
+                self._handle_exception(exc)
+
+            return self.create_response(
+                message={
+                    'status': 'success',
+                    'message': (
+                        f'{result.inserted} {label}(s) inserted, {result.updated} updated '
+                        f'and {result.unchanged} unchanged.'
+                    ),
+                    'data': result._asdict()
+                },
+                status_code=200
+            )
+
+        @route.get('/export')
+        @_named(f'export_{name}')
+        async def export_rows(self, format: ExportFormat = ExportFormat.NDJSON):
+            schema = get_response_schema(self.context.request, response_schema)
+            return export_response(model.objects.order_by('pk'), schema, format, filename=path)
+
+    ReferenceDataController.__name__ = f'{model.__name__}ReferenceDataController'
+    return ReferenceDataController
@@ -1,32 +1,33 @@
-import logging
-from typing import List
-from django.db.utils import Error
-from ninja import PatchDict
-from ninja_extra import api_controller, route, ControllerBase
-from ninja_extra.exceptions import ValidationError
+from ninja import PatchDict, Query
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
+from core.conditional import aversions_etag, conditional
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from organizations.controllers.reference import reference_data_controller
 from organizations.models import SalaryGrade
-from organizations.schemas import SalaryGradeInputSchema, SalaryGradeResponse
+from organizations.schemas import SalaryGradeFilterSchema, SalaryGradeInputSchema, SalaryGradeResponse
 
 
 @api_controller('salary-grades', tags=['Salary Grade'], permissions=[IsSuperAdmin])
-class SalaryGradeController(ControllerBase):
+class SalaryGradeController(reference_data_controller(
+    SalaryGrade,
+    SalaryGradeInputSchema,
+    SalaryGradeResponse,
+    label='Salary Grade',
+    path='salary-grades'
+)):
 
-    def _get_salary_grade_or_404(self, id: str) -> SalaryGrade:
-        salary_grade = self.get_object_or_exception(SalaryGrade, error_message="Salary Grade does not exist.", pk=id)
+    async def _get_salary_grade_or_404(self, id: str) -> SalaryGrade:
+        salary_grade = await self.aget_object_or_exception(SalaryGrade, error_message="Salary Grade does not exist.", pk=id)
         return salary_grade
 
-    def _handle_exception(self, exc):
-        if isinstance(exc, Error):
-            logging.exception(exc)
-            error_details = {'type': type(exc).__name__, 'message': 'Unable to perform operation.'}
-            raise ValidationError(error_details, 422)
-        raise exc
-    
     @route.post('/create')
-    def create_salary_grade(self, payload: SalaryGradeInputSchema):
+    async def create_salary_grade(self, payload: SalaryGradeInputSchema):
         try:
-            salary_grade = SalaryGrade.objects.create(**payload.model_dump())
+            salary_grade = await SalaryGrade.objects.acreate(**self.to_model_values(payload.model_dump()))
             message = {
                 'status': 'success',
                 'message': f'Salary Grade with id "{salary_grade.id}" created successfully.',
@@ -36,32 +37,43 @@ class SalaryGradeController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
     
-    @route.get('/', response=List[SalaryGradeResponse])
-    def get_all_salary_grades(self):
-        job_titles = SalaryGrade.objects.all()
-        return job_titles
+    @route.get('/', response=CursorPage[SalaryGradeResponse])
+    @conditional(etag=aversions_etag(SalaryGrade, SalaryGradeResponse))
+    @paginate(CursorPagination, ordering=('created_at',), schema=SalaryGradeResponse, cache=True)
+    async def get_all_salary_grades(self, filters: SalaryGradeFilterSchema = Query(...)):
+        salary_grades = filters.filter(SalaryGrade.objects.all())
+        return salary_grades
     
     @route.patch('update/{id}', response=SalaryGradeResponse)
-    def update_salary_grade(self, id: str, payload: PatchDict[SalaryGradeInputSchema]):
+    async def update_salary_grade(self, id: str, payload: PatchDict[SalaryGradeInputSchema]):
         try:
-            salary_grade = self._get_salary_grade_or_404(id)
-            for attr, value in payload.items():
+            salary_grade = await self._get_salary_grade_or_404(id)
+            for attr, value in self.to_model_values(payload).items():
                 setattr(salary_grade, attr, value)
-            salary_grade.save()
-            return salary_grade
+            await salary_grade.asave()
+
+            schema = get_response_schema(self.context.request, SalaryGradeResponse)
+            salary_grade = await aload_related(salary_grade, schema)
+            return render_response(self, salary_grade, schema)
         except Exception as exc:
             self._handle_exception(exc)
 
     @route.get('/{id}', response=SalaryGradeResponse)
-    def get_salary_grade(self, id: str):
-        salary_grade = self._get_salary_grade_or_404(id)
-        return salary_grade
+    @conditional(etag=aversions_etag(SalaryGrade, SalaryGradeResponse))
+    async def get_salary_grade(self, id: str):
+        schema = get_response_schema(self.context.request, SalaryGradeResponse)
+        salary_grade = await self.aget_object_or_exception(
+            optimize_queryset(SalaryGrade.objects.all(), schema),
+            error_message="Salary Grade does not exist.",
+            pk=id
+        )
+        return render_response(self, salary_grade, schema)
     
     @route.delete('/{id}')
-    def delete_salary_grade(self, id: str):
+    async def delete_salary_grade(self, id: str):
         try:
-            salary_grade = self._get_salary_grade_or_404(id)
-            salary_grade.delete()
+            salary_grade = await self._get_salary_grade_or_404(id)
+            await salary_grade.adelete()
             return self.create_response(
                 message={'message': 'Salary Grade successfully deleted.'},
                 status_code=200
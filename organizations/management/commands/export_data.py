@@ -0,0 +1,56 @@
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from core.export import ExportFormat, iter_export
+from organizations.models import Department, EmploymentType, JobLevel, JobTitle, SalaryGrade
+from organizations.schemas import (
+    DepartmentResponse,
+    EmploymentTypeResponse,
+    JobLevelResponse,
+    JobTitleResponse,
+    SalaryGradeResponse
+)
+from users.schemas import UserOutSchema
+
+
+User = get_user_model()
+
+RESOURCES = {
+    'users': (User, UserOutSchema),
+    'departments': (Department, DepartmentResponse),
+    'job-titles': (JobTitle, JobTitleResponse),
+    'job-levels': (JobLevel, JobLevelResponse),
+    'salary-grades': (SalaryGrade, SalaryGradeResponse),
+    'employment-types': (EmploymentType, EmploymentTypeResponse),
+}
+
+
+class Command(BaseCommand):
+    help = 'Streams users or organization reference data as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=RESOURCES)
+        parser.add_argument(
+            '--format',
+            choices=[format.value for format in ExportFormat],
+            default=ExportFormat.NDJSON.value
+        )
+        parser.add_argument('--output', default=None, help='File to write to, defaults to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows read per database round trip.')
+
+    def handle(self, *args, **options):
+        model, schema = RESOURCES[options['resource']]
+        format = ExportFormat(options['format'])
+        chunks = iter_export(model.objects.order_by('pk'), schema, format, options['chunk_size'])
+
+        try:
+            output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        except OSError as exc:
+            raise CommandError(exc)
+
+        try:
+            for chunk in chunks:
+                output.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,37 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from organizations.models import Department, EmploymentType, JobLevel, JobTitle, SalaryGrade
+from organizations.services import ReferenceDataImporter, read_csv
+
+
+RESOURCES = {
+    'departments': Department,
+    'job-titles': JobTitle,
+    'job-levels': JobLevel,
+    'salary-grades': SalaryGrade,
+    'employment-types': EmploymentType,
+}
+
+
+class Command(BaseCommand):
+    help = 'Upserts organization reference data from a CSV file, keyed on the unique name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=RESOURCES)
+        parser.add_argument('path', help='CSV file whose header names the model fields.')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows upserted per query.')
+
+    def handle(self, *args, **options):
+        importer = ReferenceDataImporter(RESOURCES[options['resource']], chunk_size=options['chunk_size'])
+        try:
+            with open(options['path'], 'rb') as file:
+                result = importer.run(read_csv(file))
+        except (OSError, UnicodeDecodeError, ValidationError) as exc:
+            raise CommandError(exc)
+
+        for error in result.errors:
+            self.stderr.write(f'Row {error["row"]}, {error["field"]}: {error["message"]}')
+        self.stdout.write(
+            f'{result.inserted} inserted, {result.updated} updated, {result.unchanged} unchanged, '
+            f'{len(result.errors)} skipped.'
+        )
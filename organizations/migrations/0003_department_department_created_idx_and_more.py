@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['created_at', 'id'], name='department_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employmenttype',
+            index=models.Index(fields=['created_at', 'id'], name='employmenttype_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joblevel',
+            index=models.Index(fields=['created_at', 'id'], name='joblevel_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobtitle',
+            index=models.Index(fields=['created_at', 'id'], name='jobtitle_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarygrade',
+            index=models.Index(fields=['created_at', 'id'], name='salarygrade_created_idx'),
+        ),
+    ]
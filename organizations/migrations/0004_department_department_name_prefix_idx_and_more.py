@@ -0,0 +1,64 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:56
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from core.operations import AddPostgresIndex
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0003_department_department_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndex(
+            model_name='department',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='department_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='department',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='department_name_trgm_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='employmenttype',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='employmenttype_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='employmenttype',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='employmenttype_name_trgm_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='joblevel',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='joblevel_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='joblevel',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='joblevel_name_trgm_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='jobtitle',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='jobtitle_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='jobtitle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='jobtitle_name_trgm_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='salarygrade',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='salarygrade_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='salarygrade',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='salarygrade_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarygrade',
+            index=models.Index(fields=['pay', 'id'], name='salarygrade_pay_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 
@@ -9,6 +11,14 @@ class JobTitle(models.Model):
     supervisor = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, related_name='+')
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='jobtitle_created_idx'),
+            # Name prefix and substring filters
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='jobtitle_name_prefix_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='jobtitle_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -19,6 +29,14 @@ class Department(models.Model):
     head_dpt = models.OneToOneField('users.User', on_delete=models.SET_NULL, null=True, related_name='+')
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='department_created_idx'),
+            # Name prefix and substring filters
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='department_name_prefix_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='department_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -28,6 +46,14 @@ class EmploymentType(models.Model):
     name = models.CharField(_('employment type'), max_length=150, unique=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='employmenttype_created_idx'),
+            # Name prefix and substring filters
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='employmenttype_name_prefix_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='employmenttype_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -39,6 +65,15 @@ class SalaryGrade(models.Model):
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='salarygrade_created_idx'),
+            # Name prefix and substring filters
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='salarygrade_name_prefix_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='salarygrade_name_trgm_idx'),
+            models.Index(fields=['pay', 'id'], name='salarygrade_pay_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -54,6 +89,14 @@ class JobLevel(models.Model):
     paternity_leave = models.PositiveSmallIntegerField(_('amount of paternity leave'), null=True, blank=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='joblevel_created_idx'),
+            # Name prefix and substring filters
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='joblevel_name_prefix_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='joblevel_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
-from ninja import Schema
+from typing import Literal, Optional
+from ninja import Field, Schema
 from pydantic import UUID4
 
+from core.filters import IndexedFilterSchema
+from organizations.models import Department, EmploymentType, JobLevel, JobTitle, SalaryGrade
 from users.schemas import UserOutSchema
 
 
@@ -64,3 +66,33 @@ class JobLevelResponse(Schema):
     maternity_leave_days: Optional[int] = None
     paternity_leave_days: Optional[int] = None
     created_at: datetime
+
+
+NameOrdering = Literal['name', '-name', 'created_at', '-created_at']
+
+class NameFilterSchema(IndexedFilterSchema):
+    name_prefix: Optional[str] = Field(None, q='name__istartswith')
+    # Trigram indexes need at least 3 characters to narrow the search
+    name_contains: Optional[str] = Field(None, min_length=3, q='name__icontains')
+    ordering: Optional[NameOrdering] = None
+
+class JobTitleFilterSchema(NameFilterSchema):
+    model = JobTitle
+    supervisor: Optional[UUID4] = None
+
+class DepartmentFilterSchema(NameFilterSchema):
+    model = Department
+    head_dpt: Optional[UUID4] = None
+
+class EmploymentTypeFilterSchema(NameFilterSchema):
+    model = EmploymentType
+
+class SalaryGradeFilterSchema(NameFilterSchema):
+    model = SalaryGrade
+    pay_min: Optional[float] = Field(None, q='pay__gte')
+    pay_max: Optional[float] = Field(None, q='pay__lte')
+    ordering: Optional[Literal[NameOrdering, 'pay', '-pay']] = None
+
+class JobLevelFilterSchema(NameFilterSchema):
+    model = JobLevel
+    salary_grade: Optional[UUID4] = None
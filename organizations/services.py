@@ -0,0 +1,286 @@
+import csv
+import hashlib
+import io
+from itertools import islice
+from typing import Iterable, List, NamedTuple
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from core.cache import aget_model_version_map, get_model_version_map, invalidate_models
+from core.projection import project_schema
+from core.query import get_schema_models, optimize_queryset
+from core.renderers import renderer
+from core.serialization import get_values_plan
+from organizations.models import Department, EmploymentType, JobLevel, JobTitle, SalaryGrade
+from organizations.schemas import (
+    DepartmentResponse,
+    EmploymentTypeResponse,
+    JobLevelResponse,
+    JobTitleResponse,
+    SalaryGradeResponse
+)
+
+
+BOOTSTRAP_COLLECTIONS = {
+    'departments': (Department, DepartmentResponse),
+    'job_titles': (JobTitle, JobTitleResponse),
+    'job_levels': (JobLevel, JobLevelResponse),
+    'salary_grades': (SalaryGrade, SalaryGradeResponse),
+    'employment_types': (EmploymentType, EmploymentTypeResponse),
+}
+
+
+class ImportResult(NamedTuple):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: List[dict] = []
+
+
+def _get_lookup_field(model):
+    # Related rows are referenced by their natural key: email for users, name otherwise
+    return getattr(model, 'USERNAME_FIELD', 'name')
+
+def get_import_fields(model) -> list:
+    """
+    Returns the fields a CSV import of `model` can set, headed by their
+    model names. Related rows are given by name, or email for users.
+    """
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field.editable
+        and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False)
+    ]
+
+def read_csv(file) -> Iterable[dict]:
+    """
+    Yields the rows of a binary CSV file one at a time, without reading the
+    whole file into memory.
+    """
+    yield from csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+
+
+class ReferenceDataImporter:
+    """
+    Upserts rows of a reference model keyed on its unique `name` with
+    bulk_create(update_conflicts=True), `chunk_size` rows at a time. Each
+    chunk costs one lookup of the existing rows, one per foreign key column
+    and at most one upsert. Rows identical to the stored ones aren't written.
+    """
+    unique_field = 'name'
+
+    def __init__(self, model, chunk_size=None):
+        self.model = model
+        self.chunk_size = chunk_size or getattr(settings, 'BULK_OPERATIONS', {}).get('BATCH_SIZE', 500)
+        self.fields = get_import_fields(model)
+        self.seen = set()
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.errors = []
+
+    def add_error(self, row, field, message):
+        self.errors.append({'row': row, 'field': field, 'message': message})
+
+    def check_columns(self, row: dict):
+        required = [self.unique_field] + [
+            field.name for field in self.fields if not field.null and not field.has_default()
+        ]
+        missing = [name for name in dict.fromkeys(required) if name not in row]
+        if missing:
+            raise DjangoValidationError(f'Missing column(s): {", ".join(missing)}.')
+
+    def run(self, rows: Iterable[dict]) -> ImportResult:
+        """
+        Imports `rows` and returns the inserted, updated and unchanged counts
+        along with the errors of the rows that were skipped. Raises a Django
+        `ValidationError` when a required column is missing.
+        """
+        rows = enumerate(rows, start=1)
+        while chunk := list(islice(rows, self.chunk_size)):
+            if chunk[0][0] == 1:
+                self.check_columns(chunk[0][1])
+            self.import_chunk(chunk)
+        return ImportResult(errors=self.errors, **self.counts)
+
+    def parse(self, number, row) -> dict:
+        values = {}
+        for field in self.fields:
+            if field.name not in row:
+                continue
+            raw = (row[field.name] or '').strip()
+            if field.is_relation:
+                values[field.name] = raw or None
+                continue
+            try:
+                value = field.to_python(raw) if raw or not field.null else None
+                if value in field.empty_values and not field.blank:
+                    raise DjangoValidationError(field.error_messages['blank'])
+            except DjangoValidationError as exc:
+                self.add_error(number, field.name, ' '.join(exc.messages))
+                return None
+            values[field.attname] = value
+
+        name = values.get(self.unique_field)
+        if not name:
+            self.add_error(number, self.unique_field, 'This field is required.')
+            return None
+        if name in self.seen:
+            self.add_error(number, self.unique_field, f'Duplicate value "{name}" in this file.')
+            return None
+        self.seen.add(name)
+        return values
+
+    def resolve_relations(self, parsed):
+        invalid = set()
+        for field in self.fields:
+            if not field.is_relation:
+                continue
+            lookup = _get_lookup_field(field.related_model)
+            keys = {values[field.name] for _, values in parsed if values.get(field.name)}
+            found = dict(
+                field.related_model._default_manager
+                .filter(**{f'{lookup}__in': keys})
+                .values_list(lookup, 'pk')
+            ) if keys else {}
+
+            for number, values in parsed:
+                if field.name not in values:
+                    continue
+                key = values.pop(field.name)
+                if key is not None and key not in found:
+                    self.add_error(number, field.name, f'No {field.related_model._meta.verbose_name} with {lookup} "{key}".')
+                    invalid.add(number)
+                else:
+                    values[field.attname] = found.get(key)
+
+        return [(number, values) for number, values in parsed if number not in invalid]
+
+    def import_chunk(self, chunk):
+        parsed = [(number, values) for number, row in chunk if (values := self.parse(number, row)) is not None]
+        parsed = self.resolve_relations(parsed)
+        if not parsed:
+            return
+
+        columns = sorted({name for _, values in parsed for name in values} - {self.unique_field})
+        names = [values[self.unique_field] for _, values in parsed]
+        existing = {
+            row[self.unique_field]: row
+            for row in self.model._default_manager.filter(**{f'{self.unique_field}__in': names})
+            .values(self.unique_field, *columns)
+        }
+
+        objs = []
+        for _, values in parsed:
+            current = existing.get(values[self.unique_field])
+            if current is None:
+                self.counts['inserted'] += 1
+            elif all(current[name] == values[name] for name in values if name in current):
+                self.counts['unchanged'] += 1
+                continue
+            else:
+                self.counts['updated'] += 1
+            objs.append(self.model(**values))
+
+        if not objs:
+            return
+
+        # Only the columns the file provides are overwritten
+        update_fields = columns + [
+            field.attname for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)
+        ]
+        if update_fields:
+            options = {'update_conflicts': True, 'unique_fields': [self.unique_field], 'update_fields': update_fields}
+        else:
+            options = {'ignore_conflicts': True}
+        with transaction.atomic():
+            self.model._default_manager.bulk_create(objs, **options)
+            # Bulk writes send no save signals
+            invalidate_models(self.model)
+
+
+def _get_collection_models() -> dict:
+    return {
+        name: get_schema_models(model, schema)
+        for name, (model, schema) in BOOTSTRAP_COLLECTIONS.items()
+    }
+
+def _hash_collection_versions(models, versions) -> dict:
+    return {
+        name: hashlib.md5('.'.join(versions[model] for model in related).encode()).hexdigest()[:12]
+        for name, related in models.items()
+    }
+
+def get_collection_versions() -> dict:
+    """
+    Returns a short version per bootstrap collection, derived from the
+    version keys of every model the collection renders.
+    """
+    models = _get_collection_models()
+    versions = get_model_version_map({model: None for related in models.values() for model in related})
+    return _hash_collection_versions(models, versions)
+
+async def aget_collection_versions() -> dict:
+    models = _get_collection_models()
+    versions = await aget_model_version_map({model: None for related in models.values() for model in related})
+    return _hash_collection_versions(models, versions)
+
+def combine_versions(versions: dict) -> str:
+    return '.'.join(versions[name] for name in BOOTSTRAP_COLLECTIONS)
+
+def split_versions(combined) -> dict:
+    """
+    Inverse of `combine_versions`, an unknown or malformed value knows no
+    collection.
+    """
+    parts = (combined or '').split('.')
+    if len(parts) != len(BOOTSTRAP_COLLECTIONS):
+        return {}
+    return dict(zip(BOOTSTRAP_COLLECTIONS, parts))
+
+def _get_collection_expand(schema, expand) -> frozenset:
+    # `expand` applies to the collections that have the field
+    return frozenset(path for path in expand if path.split('.', 1)[0] in schema.model_fields)
+
+def render_collection(name, version, expand=frozenset()) -> bytes:
+    """
+    Returns the rendered JSON array of collection `name`, read through the
+    cache under its `version`. Every table is loaded with one query, by a
+    single caller when several miss at once.
+    """
+    model, schema = BOOTSTRAP_COLLECTIONS[name]
+    expand = _get_collection_expand(schema, expand)
+    key = f'bootstrap:{name}:{version}:{",".join(sorted(expand))}'
+    return cache.get_or_set(
+        key,
+        lambda: _render_collection_items(model, project_schema(schema, None, expand)),
+        getattr(settings, 'RESPONSE_CACHE', {}).get('TIMEOUT', 60 * 60 * 24)
+    )
+
+def _render_collection_items(model, schema) -> bytes:
+    queryset = model._default_manager.order_by('created_at', 'pk')
+    plan = get_values_plan(model, schema)
+    if plan is not None:
+        items = plan.build(queryset.values(*plan.columns))
+    else:
+        items = [schema.model_validate(obj).model_dump() for obj in optimize_queryset(queryset, schema)]
+    return renderer.dumps(items)
+
+def render_bootstrap(since=None, expand=frozenset()) -> bytes:
+    """
+    Renders every reference collection whose version differs from the ones
+    in `since`, a combined version returned by an earlier bootstrap. The
+    cached arrays are spliced in as they are, nothing is re-encoded.
+    Nested users are expanded by `expand`, as on the collection endpoints.
+    """
+    versions = get_collection_versions()
+    known = split_versions(since)
+    collections = [
+        b'%s:{"version":%s,"items":%s}' % (
+            renderer.dumps(name), renderer.dumps(version), render_collection(name, version, expand)
+        )
+        for name, version in versions.items()
+        if known.get(name) != version
+    ]
+    return b'{"version":%s,"collections":{%s}}' % (
+        renderer.dumps(combine_versions(versions)), b','.join(collections)
+    )
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from core.cache import M2M_CHANGE_ACTIONS, invalidate_models
+from organizations.models import Department, EmploymentType, JobLevel, JobTitle, SalaryGrade
+
+
+User = get_user_model()
+
+# Every model rendered by the organization list responses, including the
+# users, groups and permissions nested in them
+VERSIONED_MODELS = (Department, EmploymentType, JobLevel, JobTitle, SalaryGrade, User, Group, Permission)
+
+
+def bump_model_version(sender, **kwargs):
+    invalidate_models(sender)
+
+
+def bump_m2m_versions(sender, instance, action, model, **kwargs):
+    # Either side of the relation may render the other one
+    if action in M2M_CHANGE_ACTIONS:
+        invalidate_models(type(instance), model)
+
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=versioned_model, dispatch_uid=f'version-save-{versioned_model._meta.label_lower}')
+    post_delete.connect(bump_model_version, sender=versioned_model, dispatch_uid=f'version-delete-{versioned_model._meta.label_lower}')
+
+m2m_changed.connect(bump_m2m_versions, sender=User.groups.through, dispatch_uid='version-user-groups')
+m2m_changed.connect(bump_m2m_versions, sender=Group.permissions.through, dispatch_uid='version-group-permissions')
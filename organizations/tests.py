@@ -1,3 +1,395 @@
-from django.test import TestCase  # noqa: F401
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from uuid import uuid4
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from ninja import Field
+from ninja.responses import NinjaJSONEncoder
+from ninja_extra.exceptions import ValidationError
+from core.bulk import BulkOperation
+from core.export import ExportFormat, iter_export
+from core.filters import IndexedFilterSchema
+from core.pagination import decode_cursor, encode_cursor
+from core.serialization import get_values_plan
+from organizations.models import EmploymentType, JobLevel, JobTitle, SalaryGrade
+from organizations.schemas import EmploymentTypeResponse, JobTitleResponse
+from organizations.services import ReferenceDataImporter, combine_versions, read_csv, split_versions
+from users.services import get_login_tokens
 
-# Create your tests here.
+
+User = get_user_model()
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def csv_rows(text):
+    return read_csv(io.BytesIO(text.encode()))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ApiTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_superuser('admin@example.com', 'Passw0rd!x')
+        # The access token is read from its cookie, the header only has to be present
+        access = get_login_tokens(admin)['access']
+        self.client.cookies['access_token'] = self.async_client.cookies['access_token'] = access
+        self.headers = {'Authorization': 'Bearer cookie'}
+
+    def get(self, path, params=None, **headers):
+        return self.client.get(path, params, headers={**self.headers, **headers})
+
+    def post(self, path, data, **headers):
+        return self.client.post(path, data, content_type='application/json', headers={**self.headers, **headers})
+
+
+class CursorTests(TestCase):
+
+    def test_round_trip(self):
+        ordering = ('-created_at', 'pk')
+        created_at, pk = datetime(2026, 10, 18, 6, 30, tzinfo=timezone.utc), uuid4()
+        self.assertEqual(
+            decode_cursor(encode_cursor(ordering, (created_at, pk)), ordering),
+            [created_at.isoformat(), str(pk)]
+        )
+
+    def test_tampered_cursors_are_rejected(self):
+        cursor = encode_cursor(('name', 'pk'), ('Contract', uuid4()))
+        for tampered, ordering in (
+            (cursor, ('-name', 'pk')),
+            (cursor, ('name',)),
+            (cursor[:-4], ('name', 'pk')),
+            ('not a cursor', ('name', 'pk')),
+        ):
+            with self.subTest(tampered=tampered, ordering=ordering):
+                with self.assertRaises(ValidationError):
+                    decode_cursor(tampered, ordering)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ValuesPlanTests(TestCase):
+
+    def test_output_matches_the_schema(self):
+        supervisor = User.objects.create_user('boss@example.com', 'Passw0rd!x')
+        supervisor.groups.add(*Group.objects.filter(name__in=['employee', 'supervisor']))
+        titles = [
+            JobTitle.objects.create(name='Engineer', supervisor=supervisor),
+            JobTitle.objects.create(name='Intern'),
+        ]
+
+        plan = get_values_plan(JobTitle, JobTitleResponse)
+        self.assertIsNotNone(plan)
+        items = plan.fetch([title.pk for title in titles])
+        for title in titles:
+            with self.subTest(title=title.name):
+                self.assertEqual(items[title.pk], JobTitleResponse.model_validate(title).model_dump())
+
+
+class BulkOperationTests(TestCase):
+
+    def test_create_errors_carry_item_indexes(self):
+        EmploymentType.objects.create(name='Contract')
+        with self.assertRaises(ValidationError) as raised:
+            BulkOperation(EmploymentType).create([
+                {'name': 'Full time'}, {'name': 'Part time'}, {'name': 'Part time'}, {'name': 'Contract'}
+            ])
+
+        self.assertEqual(
+            [(int(error['index']), error['field']) for error in raised.exception.detail],
+            [(1, 'name'), (2, 'name'), (3, 'name')]
+        )
+        self.assertEqual(EmploymentType.objects.count(), 1)
+
+    def test_update_reports_missing_rows_and_swapped_values(self):
+        first = EmploymentType.objects.create(name='Contract')
+        second = EmploymentType.objects.create(name='Permanent')
+        with self.assertRaises(ValidationError) as raised:
+            BulkOperation(EmploymentType).update([
+                {'id': first.pk, 'name': 'Permanent'},
+                {'id': second.pk, 'name': 'Contract'},
+                {'id': uuid4(), 'name': 'Seasonal'},
+            ])
+
+        self.assertEqual(
+            [(int(error['index']), error['field']) for error in raised.exception.detail],
+            [(0, 'name'), (1, 'name'), (2, 'id')]
+        )
+        first.refresh_from_db()
+        self.assertEqual(first.name, 'Contract')
+
+    def test_payload_names_are_mapped_to_model_fields(self):
+        grade = SalaryGrade.objects.create(name='G1', pay=1000)
+        level, = BulkOperation(JobLevel, field_names={'annual_leave_days': 'annual_leave'}).create([
+            {'name': 'Senior', 'salary_grade': grade.pk, 'annual_leave_days': 20}
+        ])
+
+        level.refresh_from_db()
+        self.assertEqual((level.salary_grade_id, level.annual_leave), (grade.pk, 20))
+
+
+class ReferenceDataImporterTests(TestCase):
+
+    def test_upserts_by_name(self):
+        SalaryGrade.objects.create(name='G1', pay=1000)
+        SalaryGrade.objects.create(name='G2', pay=2000)
+
+        result = ReferenceDataImporter(SalaryGrade, chunk_size=2).run(csv_rows(
+            'name,pay\nG1,1000\nG2,2500\nG3,3000\n'
+        ))
+
+        self.assertEqual((result.inserted, result.updated, result.unchanged, result.errors), (1, 1, 1, []))
+        self.assertEqual(
+            dict(SalaryGrade.objects.values_list('name', 'pay')), {'G1': 1000, 'G2': 2500, 'G3': 3000}
+        )
+
+    def test_bad_rows_are_skipped_with_their_row_number(self):
+        SalaryGrade.objects.create(name='G1', pay=1000)
+
+        result = ReferenceDataImporter(JobLevel).run(csv_rows(
+            'name,salary_grade,annual_leave\nJunior,G1,10\nSenior,G9,20\nJunior,G1,12\nLead,,many\n'
+        ))
+
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual([(error['row'], error['field']) for error in result.errors], [
+            (3, 'name'), (4, 'annual_leave'), (2, 'salary_grade')
+        ])
+        self.assertEqual(JobLevel.objects.get().salary_grade.name, 'G1')
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(DjangoValidationError):
+            ReferenceDataImporter(SalaryGrade).run(csv_rows('name\nG1\n'))
+
+
+class EmploymentTypeApiTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in ('Contract', 'Full time', 'Intern', 'Part time', 'Seasonal'):
+            EmploymentType.objects.create(name=name)
+
+    def test_pages_follow_the_cursor(self):
+        names, cursor = [], ''
+        while True:
+            response = self.get('/api/employment-types/', {'page_size': 2, 'ordering': 'name', 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            names += [item['name'] for item in page['items']]
+            if not page['next_cursor']:
+                break
+            cursor = page['next_cursor']
+
+        self.assertEqual(names, ['Contract', 'Full time', 'Intern', 'Part time', 'Seasonal'])
+
+    def test_tampered_cursor_is_a_bad_request(self):
+        response = self.get('/api/employment-types/', {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_matches_the_pydantic_rendering(self):
+        response = self.get('/api/employment-types/', {'ordering': 'name'})
+        expected = [
+            json.loads(json.dumps(EmploymentTypeResponse.model_validate(obj).model_dump(), cls=NinjaJSONEncoder))
+            for obj in EmploymentType.objects.order_by('name')
+        ]
+        self.assertEqual(response.json()['items'], expected)
+
+    def test_bulk_errors_are_returned_by_index(self):
+        response = self.post('/api/employment-types/bulk', [{'name': 'Temporary'}, {'name': 'Intern'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([int(error['index']) for error in response.json()['detail']], [1])
+        self.assertFalse(EmploymentType.objects.filter(name='Temporary').exists())
+
+    def test_bulk_writes_refresh_cached_lists(self):
+        self.assertEqual(len(self.get('/api/employment-types/').json()['items']), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.post('/api/employment-types/bulk', [{'name': 'Temporary'}]).status_code, 200)
+
+        self.assertEqual(len(self.get('/api/employment-types/').json()['items']), 6)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.get('/api/employment-types/')['ETag']
+        self.assertEqual(self.get('/api/employment-types/', **{'If-None-Match': etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('/api/employment-types/bulk', [{'name': 'Temporary'}])
+
+        response = self.get('/api/employment-types/', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_job_level_routes_map_leave_fields(self):
+        grade = SalaryGrade.objects.create(name='G1', pay=1000)
+        payload = {'name': 'Senior', 'salary_grade': str(grade.pk), 'annual_leave_days': 20}
+
+        self.assertEqual(self.post('/api/job-levels/create', payload).status_code, 200)
+        self.assertEqual(self.post('/api/job-levels/bulk', [{**payload, 'name': 'Lead'}]).status_code, 200)
+
+        self.assertEqual(
+            dict(JobLevel.objects.values_list('name', 'annual_leave')), {'Senior': 20, 'Lead': 20}
+        )
+
+    def test_import_endpoint_reports_counts(self):
+        file = SimpleUploadedFile('types.csv', b'name\nIntern\nTemporary\n', content_type='text/csv')
+        response = self.client.post('/api/employment-types/import', {'file': file}, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['inserted'], 1)
+        self.assertEqual(response.json()['data']['unchanged'], 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ExportTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        supervisor = User.objects.create_user('boss@example.com', 'Passw0rd!x')
+        supervisor.groups.add(Group.objects.get(name='supervisor'))
+        JobTitle.objects.create(name='Engineer', supervisor=supervisor)
+        JobTitle.objects.create(name='Intern')
+
+    def export(self, format):
+        return iter_export(JobTitle.objects.order_by('name'), JobTitleResponse, format, chunk_size=1)
+
+    def test_ndjson_has_one_item_per_line(self):
+        chunks = self.export(ExportFormat.NDJSON)
+        self.assertNotIsInstance(chunks, (list, tuple))
+
+        items = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([item['name'] for item in items], ['Engineer', 'Intern'])
+        self.assertEqual(items[0]['supervisor']['email'], 'boss@example.com')
+        self.assertIsNone(items[1]['supervisor'])
+
+    def test_csv_flattens_nested_objects(self):
+        rows = list(csv.DictReader(io.StringIO(''.join(self.export(ExportFormat.CSV)))))
+
+        self.assertEqual([row['name'] for row in rows], ['Engineer', 'Intern'])
+        self.assertEqual(rows[0]['supervisor.email'], 'boss@example.com')
+        # Lists stay one column of JSON
+        self.assertEqual(
+            json.loads(rows[0]['supervisor.groups']),
+            JobTitleResponse.model_validate(JobTitle.objects.get(name='Engineer')).model_dump()['supervisor']['groups']
+        )
+        self.assertEqual(rows[1]['supervisor.email'], '')
+
+    async def test_export_endpoint_streams(self):
+        response = await self.async_client.get(
+            '/api/job-titles/export', {'format': 'csv'}, headers=self.headers
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="job-titles.csv"')
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(content.splitlines()[0].split(',')[:2], ['id', 'name'])
+        self.assertEqual(len(content.splitlines()), 3)
+
+
+class BootstrapTests(ApiTestCase):
+
+    def bootstrap(self, since=None):
+        response = self.get('/api/bootstrap/', {'since': since} if since else None)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_lists_every_collection(self):
+        EmploymentType.objects.create(name='Contract')
+        data = self.bootstrap()
+
+        self.assertEqual(set(data['collections']), {
+            'departments', 'job_titles', 'job_levels', 'salary_grades', 'employment_types'
+        })
+        self.assertEqual([item['name'] for item in data['collections']['employment_types']['items']], ['Contract'])
+        self.assertEqual(
+            data['version'], combine_versions({name: item['version'] for name, item in data['collections'].items()})
+        )
+
+    def test_since_skips_unchanged_collections(self):
+        version = self.bootstrap()['version']
+        self.assertEqual(self.bootstrap(version)['collections'], {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EmploymentType.objects.create(name='Contract')
+
+        data = self.bootstrap(version)
+        self.assertEqual(list(data['collections']), ['employment_types'])
+        self.assertNotEqual(data['version'], version)
+        self.assertEqual(split_versions(data['version'])['departments'], split_versions(version)['departments'])
+
+    def test_malformed_since_returns_everything(self):
+        self.assertEqual(len(self.bootstrap('not.a.version')['collections']), 5)
+
+
+class ProjectionTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        supervisor = User.objects.create_user('boss@example.com', 'Passw0rd!x')
+        supervisor.groups.add(Group.objects.get(name='supervisor'))
+        self.title = JobTitle.objects.create(name='Engineer', supervisor=supervisor)
+        self.path = f'/api/job-titles/{self.title.pk}'
+
+    def test_nested_users_are_references_unless_expanded(self):
+        supervisor = self.get(self.path).json()['supervisor']
+        self.assertEqual(set(supervisor), {'id', 'email'})
+
+        supervisor = self.get(self.path, {'expand': 'supervisor'}).json()['supervisor']
+        self.assertEqual(supervisor['email'], 'boss@example.com')
+        self.assertIn('groups', supervisor)
+
+    def test_fields_narrow_the_response(self):
+        self.assertEqual(self.get(self.path, {'fields': 'name'}).json(), {'name': 'Engineer'})
+        self.assertEqual(
+            self.get(self.path, {'fields': 'name,supervisor.email'}).json(),
+            {'name': 'Engineer', 'supervisor': {'email': 'boss@example.com'}}
+        )
+
+    def test_pages_are_projected_too(self):
+        items = self.get('/api/job-titles/', {'fields': 'id'}).json()['items']
+        self.assertEqual(items, [{'id': str(self.title.pk)}])
+
+    def test_unknown_fields_are_a_bad_request(self):
+        for params in ({'fields': 'salary'}, {'fields': 'name.first'}, {'expand': 'name'}, {'expand': 'manager'}):
+            with self.subTest(params=params):
+                response = self.get(self.path, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.json()['detail'])
+
+
+class IndexedFilterSchemaTests(TestCase):
+
+    def test_unindexed_filters_are_refused(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, '"annual_leave"'):
+            class LeaveFilterSchema(IndexedFilterSchema):
+                model = JobLevel
+                annual_leave: Optional[int] = None
+
+    def test_lookups_need_a_matching_index_kind(self):
+        # pay has a btree index, which can't serve substring searches
+        with self.assertRaisesMessage(ImproperlyConfigured, '"pay__icontains"'):
+            class PayFilterSchema(IndexedFilterSchema):
+                model = SalaryGrade
+                pay_contains: Optional[str] = Field(None, q='pay__icontains')
+
+    def test_ordering_choices_are_checked(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, '"annual_leave"'):
+            class LeaveOrderingSchema(IndexedFilterSchema):
+                model = JobLevel
+                ordering: Optional[Literal['name', '-annual_leave']] = None
+
+    def test_paths_are_followed_through_relations(self):
+        class GradePayFilterSchema(IndexedFilterSchema):
+            model = JobLevel
+            pay_min: Optional[float] = Field(None, q='salary_grade__pay__gte')
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'organizations.SalaryGrade'):
+            class GradeUpdatedFilterSchema(IndexedFilterSchema):
+                model = JobLevel
+                updated_after: Optional[datetime] = Field(None, q='salary_grade__updated_at__gte')
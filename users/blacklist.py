@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+from threading import Lock
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from ninja_jwt.exceptions import TokenError
+from ninja_jwt.settings import api_settings
+from ninja_jwt.token_blacklist.models import BlacklistedToken
+from ninja_jwt.tokens import RefreshToken
+from core.cache import bump_versions, get_versions
+
+
+TOKEN_BLACKLIST = getattr(settings, 'TOKEN_BLACKLIST', {})
+
+BLACKLIST_VERSION_KEY = 'users:blacklist-version'
+
+# Rows committed late by a slow transaction are still picked up if they are
+# younger than this when the next refresh runs
+SYNC_OVERLAP = timedelta(seconds=60)
+# Rebuild from scratch this often in case an update was missed anyway
+FULL_RELOAD_INTERVAL = 300
+
+
+class BlacklistFilter:
+    """
+    In-process index of the JTIs of blacklisted tokens that have not expired
+    yet. It is loaded on first use and kept current by re-reading recently
+    blacklisted rows whenever the shared blacklist version changes.
+
+    A miss is authoritative, so the common case needs no database access. A
+    hit is confirmed against the database. Misses are only trusted when
+    `TOKEN_BLACKLIST['FILTER']` is on and the version is kept in a cache
+    every process reads. Otherwise each check goes to the database, as a
+    process couldn't tell that another one blacklisted a token.
+    """
+    def __init__(self):
+        self._expiries = {}
+        self._version = None
+        self._synced_at = None
+        self._loaded_at = 0
+        self._lock = Lock()
+
+    def _current_version(self):
+        return get_versions([BLACKLIST_VERSION_KEY])[BLACKLIST_VERSION_KEY]
+
+    def _sync(self):
+        version = self._current_version()
+        full_reload = time.monotonic() - self._loaded_at > FULL_RELOAD_INTERVAL
+        if version == self._version and not full_reload:
+            return
+
+        with self._lock:
+            now = timezone.now()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+            if full_reload or self._synced_at is None:
+                expiries = {}
+                self._loaded_at = time.monotonic()
+            else:
+                expiries = {jti: exp for jti, exp in self._expiries.items() if exp > now}
+                rows = rows.filter(blacklisted_at__gte=self._synced_at - SYNC_OVERLAP)
+
+            expiries.update(rows.values_list('token__jti', 'token__expires_at'))
+            self._expiries = expiries
+            self._synced_at = now
+            self._version = version
+
+    def trusts_misses(self):
+        if not TOKEN_BLACKLIST.get('FILTER', True):
+            return False
+        # A version kept in process memory never reaches the other processes
+        version_cache = caches[DEFAULT_CACHE_ALIAS]
+        version_cache = getattr(version_cache, 'shared', version_cache)
+        return not isinstance(version_cache, (LocMemCache, DummyCache))
+
+    def add(self, jti, expires_at):
+        self._expiries[jti] = expires_at
+
+    def contains(self, jti):
+        if self.trusts_misses():
+            self._sync()
+            if jti not in self._expiries:
+                return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def clear(self):
+        with self._lock:
+            self._expiries = {}
+            self._version = None
+            self._synced_at = None
+            self._loaded_at = 0
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def is_token_blacklisted(jti):
+    return blacklist_filter.contains(jti)
+
+def publish_blacklist_change():
+    """
+    Tells every process to pick up newly blacklisted tokens on their next
+    check. Bulk inserts skip post_save and must call this themselves.
+    """
+    bump_versions(BLACKLIST_VERSION_KEY)
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the in-process filter.
+    """
+    def check_blacklist(self) -> None:
+        if is_token_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
@@ -0,0 +1,218 @@
+import copy
+from datetime import datetime
+from typing import FrozenSet, NamedTuple
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from core.cache import aget_versions, bump_versions, get_versions
+
+
+AUTH_USER_CACHE = getattr(settings, 'AUTH_USER_CACHE', {})
+AUTH_USER_CACHE_TIMEOUT = AUTH_USER_CACHE.get('TIMEOUT', 300)
+
+ROLES_GENERATION_KEY = 'users:roles-generation'
+ROLE_CLAIM = 'roles'
+
+
+class UserRoles(NamedTuple):
+    groups: FrozenSet[str] = frozenset()
+    permissions: FrozenSet[str] = frozenset()
+
+
+def _version_key(user_id):
+    return f'users:auth-version:{user_id}'
+
+def _snapshot_key(user_id, version):
+    return f'users:auth-snapshot:{user_id}:{version}'
+
+def get_user_version(user):
+    return user.updated_at.isoformat()
+
+def get_user_snapshot(user_id):
+    """
+    Returns a copy of the cached user for `user_id`, or None when there is no
+    snapshot for the user's current version.
+    """
+    user_id = str(user_id)
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        return None
+
+    # Snapshots are keyed by version, so the default cache keeps them in process
+    user = cache.get(_snapshot_key(user_id, version))
+    if user is None:
+        return None
+
+    # Callers may mutate request.user, never hand out the cached instance
+    return copy.copy(user)
+
+async def aget_user_snapshot(user_id):
+    """
+    Async counterpart of `get_user_snapshot`.
+    """
+    user_id = str(user_id)
+    version = await cache.aget(_version_key(user_id))
+    if version is None:
+        return None
+
+    user = await cache.aget(_snapshot_key(user_id, version))
+    if user is None:
+        return None
+
+    return copy.copy(user)
+
+def store_user_snapshot(user):
+    user_id = str(user.pk)
+    version = get_user_version(user)
+
+    # `add` keeps a newer version already published by a save signal
+    cache.add(_version_key(user_id), version, AUTH_USER_CACHE_TIMEOUT)
+    cache.set(_snapshot_key(user_id, version), copy.copy(user), AUTH_USER_CACHE_TIMEOUT)
+
+async def aget_user_updated_at(user_id):
+    """
+    Returns when `user_id` was last saved, read from its published version
+    when there is one. Returns None for unknown users and malformed ids.
+    """
+    version = await cache.aget(_version_key(user_id))
+    if version is not None:
+        return datetime.fromisoformat(version)
+
+    try:
+        updated_at = await get_user_model().objects.filter(pk=user_id).values_list('updated_at', flat=True).afirst()
+    except ValidationError:
+        return None
+    if updated_at is not None:
+        await cache.aadd(_version_key(user_id), updated_at.isoformat(), AUTH_USER_CACHE_TIMEOUT)
+    return updated_at
+
+def invalidate_user_snapshot(user_id, version=None):
+    """
+    Moves the user to `version` (or drops its version entirely), so every
+    process stops serving the previous snapshot on its next lookup.
+    """
+    if version is None:
+        cache.delete(_version_key(user_id))
+    else:
+        cache.set(_version_key(user_id), version, AUTH_USER_CACHE_TIMEOUT)
+
+def _user_roles_generation_key(user_id):
+    return f'users:roles-generation:{user_id}'
+
+def _roles_key(user_id, version):
+    return f'users:roles:{user_id}:{version}'
+
+def get_roles_version(user_id):
+    """
+    Returns the version string the roles of `user_id` are cached under. It
+    changes whenever the user's groups or any group's permissions change.
+    """
+    keys = [ROLES_GENERATION_KEY, _user_roles_generation_key(user_id)]
+    generations = get_versions(keys)
+    return '.'.join(generations[key] for key in keys)
+
+async def aget_roles_version(user_id):
+    """
+    Async counterpart of `get_roles_version`.
+    """
+    keys = [ROLES_GENERATION_KEY, _user_roles_generation_key(user_id)]
+    generations = await aget_versions(keys)
+    return '.'.join(generations[key] for key in keys)
+
+def _get_roles_querysets(user):
+    groups = user.groups.values_list('name', flat=True)
+    permissions = Permission.objects.filter(
+        Q(group__user=user) | Q(user=user)
+    ).values_list('content_type__app_label', 'codename').distinct()
+    return groups, permissions
+
+def load_user_roles(user):
+    groups, permissions = _get_roles_querysets(user)
+    return UserRoles(
+        groups=frozenset(groups),
+        permissions=frozenset(f'{app_label}.{codename}' for app_label, codename in permissions)
+    )
+
+async def aload_user_roles(user):
+    groups, permissions = _get_roles_querysets(user)
+    return UserRoles(
+        groups=frozenset([name async for name in groups]),
+        permissions=frozenset([f'{app_label}.{codename}' async for app_label, codename in permissions])
+    )
+
+def get_user_roles(user):
+    """
+    Resolves the group names and permission codenames of `user` once and
+    memoizes them on the instance for the rest of the request.
+    """
+    roles = getattr(user, '_cached_roles', None)
+    if roles is not None:
+        return roles
+
+    user_id = str(user.pk)
+    version = get_roles_version(user_id)
+    # Concurrent misses wait for one of them to load the roles
+    roles = cache.get_or_set(
+        _roles_key(user_id, version), lambda: load_user_roles(user), AUTH_USER_CACHE_TIMEOUT
+    )
+
+    user._cached_roles = roles
+    return roles
+
+async def aget_user_roles(user):
+    """
+    Async counterpart of `get_user_roles`, which it leaves nothing to do for
+    the rest of the request.
+    """
+    roles = getattr(user, '_cached_roles', None)
+    if roles is not None:
+        return roles
+
+    user_id = str(user.pk)
+    version = await aget_roles_version(user_id)
+    # The default cache, a TieredCache, awaits coroutine defaults
+    roles = await cache.aget_or_set(
+        _roles_key(user_id, version), lambda: aload_user_roles(user), AUTH_USER_CACHE_TIMEOUT
+    )
+
+    user._cached_roles = roles
+    return roles
+
+def get_role_claims(user):
+    roles = get_user_roles(user)
+    return {
+        'v': get_roles_version(user.pk),
+        'groups': sorted(roles.groups),
+        'permissions': sorted(roles.permissions),
+    }
+
+def _roles_from_claims(claims):
+    return UserRoles(
+        groups=frozenset(claims.get('groups', [])),
+        permissions=frozenset(claims.get('permissions', []))
+    )
+
+def apply_role_claims(user, validated_token):
+    """
+    Seeds the roles of `user` from the signed claims of `validated_token`
+    when they were issued for the roles version that is still current.
+    """
+    claims = validated_token.get(ROLE_CLAIM)
+    if not claims or claims.get('v') != get_roles_version(user.pk):
+        return
+    user._cached_roles = _roles_from_claims(claims)
+
+async def aapply_role_claims(user, validated_token):
+    claims = validated_token.get(ROLE_CLAIM)
+    if not claims or claims.get('v') != await aget_roles_version(user.pk):
+        return
+    user._cached_roles = _roles_from_claims(claims)
+
+def invalidate_user_roles(user_id):
+    bump_versions(_user_roles_generation_key(user_id))
+
+def invalidate_all_roles():
+    bump_versions(ROLES_GENERATION_KEY)
@@ -1,14 +1,22 @@
 import logging
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest, HttpResponse
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from ninja.errors import HttpError
 from ninja_extra import api_controller, route, exceptions
-from ninja_jwt.tokens import RefreshToken, UntypedToken
-from ninja_jwt.token_blacklist.models import BlacklistedToken
-from ninja_jwt.controller import NinjaJWTDefaultController
+from ninja_extra.throttling import throttle
+from ninja_jwt.tokens import UntypedToken
+from ninja_jwt.controller import AsyncNinjaJWTDefaultController
 from ninja_jwt.settings import api_settings
-from ninja_jwt.exceptions import ValidationError
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken, TokenError, ValidationError
+from core.controllers import AsyncControllerBase
+from core.hashing import hash_password, run_hashing
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, get_nested_schema
+from core.throttling import AccountThrottle, ClientThrottle
+from users.blacklist import FilteredRefreshToken, is_token_blacklisted
 from users.schemas import (
     LoginOutSchema,
     LoginInputSchema,
@@ -16,23 +24,53 @@ from users.schemas import (
     ForgotPasswordInput,
     ResetPasswordInput
 )
-from utils.helpers import USER_VERIFY_ACCOUNT, USER_FORGOT_PASSWORD, verify_hashed_text
-from utils.email import (
-    send_successful_password_reset_email,
-    send_successful_verification_email,
-    send_password_reset_email
-)
+from users.services import authenticate_user, get_login_tokens, reset_user_password, verify_user_account
+from utils.helpers import USER_VERIFY_ACCOUNT, USER_FORGOT_PASSWORD, check_account_token
+from utils.email import send_password_reset_email
 
 
 User = get_user_model()
 
 
+def _rotate_refresh_token(refresh_token) -> dict:
+    # Checks the refresh token against the blacklist filter
+    try:
+        refresh = FilteredRefreshToken(refresh_token)
+    except TokenError as exc:
+        raise InvalidToken(exc.args[0]) from exc
+
+    data = {"access": str(refresh.access_token)}
+
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            try:
+                # Attempt to blacklist the given refresh token
+                refresh.blacklist()
+            except AttributeError:
+                # If blacklist app not installed, `blacklist` method will
+                # not be present
+                pass
+
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+
+        data["refresh"] = str(refresh)
+
+    return data
+
+
 @api_controller('auth', tags=['Auth'], auth=None)
-class AuthController(NinjaJWTDefaultController):
+class AuthController(AsyncNinjaJWTDefaultController, AsyncControllerBase):
 
     @route.post('/login', response=LoginOutSchema, url_name="token_obtain_pair")
-    def obtain_token(self, user_token: LoginInputSchema):
-        token_data = user_token.get_response_schema_init_kwargs()
+    @throttle(ClientThrottle('login_client'), AccountThrottle('email', 'login_account'))
+    async def obtain_token(self, credentials: LoginInputSchema):
+        user = await authenticate_user(credentials.email, credentials.password)
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_("No active account found with the given credentials"))
+
+        token_data = await sync_to_async(get_login_tokens)(user)
         response: HttpResponse = self.context.response
         response.set_cookie(
             key="refresh_token",
@@ -53,45 +91,29 @@ class AuthController(NinjaJWTDefaultController):
             max_age=api_settings.ACCESS_TOKEN_LIFETIME
         )
         
+        # The user is reduced to {id, email} unless `?expand=user`
+        schema = get_response_schema(self.context.request, LoginOutSchema)
         data = {
             "status": "success",
             "message": "User successfully logged in.",
-            "user": token_data["user"]
+            "user": await aload_related(user, get_nested_schema(schema.model_fields['user'].annotation))
         }
 
-        return data
+        return render_response(self, data, schema)
     
 
     @route.post('/refresh', url_name="token_refresh", response={204: None})
-    def refresh_token(self):
+    async def refresh_token(self):
         request: HttpRequest = self.context.request
         refresh_token = request.COOKIES.get("refresh_token")
         if not refresh_token:
             raise exceptions.ValidationError('refresh token is missing from cookie')
         
-        refresh = RefreshToken(refresh_token)
-        data = {}
-
-        data = {"access": str(refresh.access_token)}
+        data = await sync_to_async(_rotate_refresh_token)(refresh_token)
 
         response: HttpResponse = self.context.response
 
-        if api_settings.ROTATE_REFRESH_TOKENS:
-            if api_settings.BLACKLIST_AFTER_ROTATION:
-                try:
-                    # Attempt to blacklist the given refresh token
-                    refresh.blacklist()
-                except AttributeError:
-                    # If blacklist app not installed, `blacklist` method will
-                    # not be present
-                    pass
-
-            refresh.set_jti()
-            refresh.set_exp()
-            refresh.set_iat()
-
-            data["refresh"] = str(refresh)
-
+        if "refresh" in data:
             response.set_cookie(
                 key="refresh_token",
                 value=str(data["refresh"]),
@@ -116,7 +138,7 @@ class AuthController(NinjaJWTDefaultController):
     
 
     @route.post('/verify', url_name='token_verify', response={204:None})
-    def verify_token(self):
+    async def verify_token(self):
         request: HttpRequest = self.context.request
         access_token = request.COOKIES.get("access_token")
 
@@ -130,14 +152,14 @@ class AuthController(NinjaJWTDefaultController):
             and "ninja_jwt.token_blacklist" in settings.INSTALLED_APPS
         ):
             jti = token.get(api_settings.JTI_CLAIM)
-            if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            if await sync_to_async(is_token_blacklisted)(jti):
                 raise ValidationError("Token is blacklisted")
         
         return 204, None
     
 
     @route.post('logout', url_name='logout')
-    def logout(self):
+    async def logout(self):
         res = self.create_response(
             message={
                 'status': 'success',
@@ -152,13 +174,14 @@ class AuthController(NinjaJWTDefaultController):
 
 
     @route.post('/verify-user', url_name='verify_user')
-    def verify_user(self, payload: VerifyUserInput):
-        user = self.get_object_or_exception(User, error_message="User does not exist.", pk=payload.uid)
+    @throttle(ClientThrottle('account_token_client'), AccountThrottle('uid', 'account_token_account'))
+    async def verify_user(self, payload: VerifyUserInput):
+        user = await self.aget_object_or_exception(User, error_message="User does not exist.", pk=payload.uid)
         user_token = user.get_context_string(context=USER_VERIFY_ACCOUNT)
 
-        # Verify token
+        # Verify token, legacy tokens are bcrypt hashes
         try:
-            token_valid = verify_hashed_text(user_token, payload.token)
+            token_valid = await run_hashing(check_account_token, user_token, payload.token)
         except Exception as verify_exec:
             logging.exception(verify_exec)
             token_valid = False
@@ -166,13 +189,8 @@ class AuthController(NinjaJWTDefaultController):
         if not token_valid:
             raise HttpError(status_code=400, message='The link is either expired or not valid.')
         
-        user.is_active = True
-        user.is_verified = True
-        user.set_password(payload.new_password)
-        user.save()
-
-        # Send successful verification email to user
-        send_successful_verification_email(user)
+        # Saves the user and queues the successful verification email
+        await sync_to_async(verify_user_account)(user, await hash_password(payload.new_password))
 
         return self.create_response(
             message={
@@ -184,16 +202,17 @@ class AuthController(NinjaJWTDefaultController):
     
 
     @route.post('/forgot-password', url_name='forgot_password')
-    def forgot_password(self, payload: ForgotPasswordInput):
-        user = self.get_object_or_exception(User, error_message="User with email does not exist.", email=payload.email)
+    @throttle(ClientThrottle('forgot_password_client'), AccountThrottle('email', 'forgot_password_account'))
+    async def forgot_password(self, payload: ForgotPasswordInput):
+        user = await self.aget_object_or_exception(User, error_message="User with email does not exist.", email=payload.email)
 
         if not user.is_verified:
             raise HttpError(status_code=400, message='Your account is not verified. Please check your email inbox to verify your account, or reach admin.')
         if not user.is_active:
             raise HttpError(status_code=403, message='This account is deactivated. Reach out to Admin.')
         
-        # Send password-reset email to user
-        send_password_reset_email(user)
+        # Queue password-reset email to user
+        await sync_to_async(send_password_reset_email)(user)
 
         return self.create_response(
             message={
@@ -205,8 +224,9 @@ class AuthController(NinjaJWTDefaultController):
 
 
     @route.post('reset-password', url_name='reset_password')
-    def reset_password(self, payload: ResetPasswordInput):
-        user = self.get_object_or_exception(User, error_message="User does not exist.", pk=payload.uid)
+    @throttle(ClientThrottle('account_token_client'), AccountThrottle('uid', 'account_token_account'))
+    async def reset_password(self, payload: ResetPasswordInput):
+        user = await self.aget_object_or_exception(User, error_message="User does not exist.", pk=payload.uid)
         # Verify user account is verified
         if not user.is_verified:
             raise HttpError(status_code=400, detail='Invalid request.')
@@ -216,9 +236,9 @@ class AuthController(NinjaJWTDefaultController):
         
         user_token = user.get_context_string(context=USER_FORGOT_PASSWORD)
         
-        # Verify token
+        # Verify token, legacy tokens are bcrypt hashes
         try:
-            token_valid = verify_hashed_text(user_token, payload.token)
+            token_valid = await run_hashing(check_account_token, user_token, payload.token)
         except Exception as verify_exec:
             logging.exception(verify_exec)
             token_valid = False
@@ -226,11 +246,8 @@ class AuthController(NinjaJWTDefaultController):
         if not token_valid:
             raise HttpError(status_code=400, message='The link is either expired or not valid.')
         
-        user.set_password(payload.new_password)
-        user.save()
-
-        # Send password-reset confirmation mail
-        send_successful_password_reset_email(user)
+        # Saves the password and queues the password-reset confirmation mail
+        await sync_to_async(reset_user_password)(user, await hash_password(payload.new_password))
 
         return self.create_response(
             message={
@@ -1,29 +1,69 @@
+import csv
+import hashlib
+import io
 import logging
 from typing import List
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Group
 from django.db.utils import Error
-from ninja_extra import api_controller, route, ControllerBase
+from ninja import File, Query
+from ninja.files import UploadedFile
+from ninja_extra import api_controller, route
+from ninja_extra.pagination import paginate
 from ninja_extra.exceptions import ValidationError
 from ninja_extra.permissions import IsAuthenticated
-from ninja_jwt.tokens import RefreshToken
-from ninja_jwt.token_blacklist.models import OutstandingToken
+from core.conditional import aversions_etag, conditional
+from core.controllers import AsyncControllerBase
+from core.export import ExportFormat, export_response
+from core.hashing import check_password_hash, hash_password
+from core.pagination import CursorPage, CursorPagination
 from core.permission import IsSuperAdmin
+from core.projection import get_response_schema, render_response
+from core.query import aload_related, optimize_queryset
+from users.cache import aget_roles_version, aget_user_updated_at
 from users.schemas import (
+    BulkRegisterInput,
+    BulkRegisterResult,
     UserInSchema,
+    UserFilterSchema,
     UserOutSchema,
+    UserRefSchema,
+    UserIdsInput,
     ChangePasswordInput
 )
-from utils.email import send_deactivation_email, send_verification_email
+from users.services import (
+    deactivate_user_account,
+    deactivate_users,
+    register_user_account,
+    register_users,
+    search_users
+)
 
 
 User = get_user_model()
 
+USER_SEARCH = getattr(settings, 'USER_SEARCH', {})
+
+
+async def _get_user_etag(request, id):
+    updated_at = await aget_user_updated_at(id)
+    if updated_at is None:
+        return None
+    # The user's groups and their permissions are rendered too, in the
+    # projection the query string asks for
+    projection = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:8]
+    return f'{updated_at.isoformat()}.{await aget_roles_version(id)}.{projection}'
+
+async def _get_user_last_modified(request, id):
+    return await aget_user_updated_at(id)
+
+
 @api_controller('users', tags=['User'], permissions=[IsSuperAdmin])
-class UserController(ControllerBase):
+class UserController(AsyncControllerBase):
 
-    def _get_user_or_404(self, id: str):
-        user = self.get_object_or_exception(User, error_message="User does not exist.", pk=id)
+    async def _get_user_or_404(self, id: str):
+        user = await self.aget_object_or_exception(User, error_message="User does not exist.", pk=id)
         return user
 
     def _handle_exception(self, exc):
@@ -34,13 +74,13 @@ class UserController(ControllerBase):
         raise exc
 
     @route.post('/register')
-    def register_user(self, payload: UserInSchema):
-        try:
-            email = payload.email
-            user = User.objects.create_user(email)
+    async def register_user(self, payload: UserInSchema):
+        if await User.objects.filter(email=payload.email).aexists():
+            raise ValidationError('Email already exists')
 
-            user_group = Group.objects.get(name='employee')
-            user_group.user_set.add(user)
+        try:
+            # Creates the user and queues its verification email
+            user = await sync_to_async(register_user_account)(payload.email)
             message = {
                 'status': 'success',
                 'message': f'User with id "{user.id}" created successfully.',
@@ -49,30 +89,85 @@ class UserController(ControllerBase):
         except Exception as exc:
             self._handle_exception(exc)
 
-        # Send verification email to user
-        send_verification_email(user)
-
         return self.create_response(message=message, status_code=200)
+
+    async def _bulk_register(self, emails):
+        max_items = getattr(settings, 'BULK_OPERATIONS', {}).get('MAX_ITEMS', 5000)
+        if len(emails) > max_items:
+            raise ValidationError({'emails': f'At most {max_items} users can be registered at once.'})
+
+        try:
+            results = await sync_to_async(register_users)(emails)
+        except Exception as exc:
+            self._handle_exception(exc)
+
+        created = sum(result['status'] == 'created' for result in results)
+        return self.create_response(
+            message={
+                'status': 'success',
+                'message': f'{created} user(s) created.',
+                'data': [BulkRegisterResult(**result) for result in results]
+            },
+            status_code=200
+        )
+
+    @route.post('/register/bulk')
+    async def bulk_register_users(self, payload: BulkRegisterInput):
+        return await self._bulk_register(payload.emails)
+
+    @route.post('/register/bulk/csv')
+    async def bulk_register_users_csv(self, file: UploadedFile = File(...)):
+        try:
+            reader = csv.DictReader(io.StringIO(file.read().decode('utf-8-sig')))
+            if 'email' not in (reader.fieldnames or []):
+                raise ValidationError({'file': "The CSV file needs an 'email' column."})
+            emails = [row['email'] or '' for row in reader]
+        except (UnicodeDecodeError, csv.Error):
+            raise ValidationError({'file': 'The file is not a valid UTF-8 CSV file.'})
+        return await self._bulk_register(emails)
     
-    @route.get('/', response=List[UserOutSchema])
-    def get_all_users(self):
-        users = User.objects.all()
+    @route.get('/', response=CursorPage[UserOutSchema])
+    @conditional(etag=aversions_etag(User, UserOutSchema))
+    @paginate(CursorPagination, ordering=('date_joined',), schema=UserOutSchema)
+    async def get_all_users(self, filters: UserFilterSchema = Query(...)):
+        users = filters.filter(User.objects.all())
         return users
     
+    @route.get('/search', response=List[UserRefSchema])
+    async def search_user_directory(
+        self,
+        q: str = Query(..., min_length=1),
+        limit: int = Query(USER_SEARCH.get('DEFAULT_LIMIT', 10), ge=1, le=USER_SEARCH.get('MAX_LIMIT', 50))
+    ):
+        """
+        Typeahead search of users by email for people pickers, best matches
+        first.
+        """
+        return await search_users(q, limit)
+    
+    @route.get('/export')
+    async def export_users(self, format: ExportFormat = ExportFormat.NDJSON):
+        schema = get_response_schema(self.context.request, UserOutSchema)
+        return export_response(User.objects.order_by('pk'), schema, format, filename='users')
+    
     @route.get('/current-user', response=UserOutSchema, permissions=[IsAuthenticated])
-    def get_authenticated_user(self):
-        user = self.context.request.user
-        return user
+    async def get_authenticated_user(self):
+        schema = get_response_schema(self.context.request, UserOutSchema)
+        # The authenticated user comes without its groups
+        user = await aload_related(self.context.request.user, schema)
+        return render_response(self, user, schema)
     
     @route.post('/change-password', permissions=[IsAuthenticated])
-    def change_user_password(self, payload: ChangePasswordInput):
+    async def change_user_password(self, payload: ChangePasswordInput):
         user = self.context.request.user
 
-        if not user.check_password(payload.current_password):
+        is_correct, _ = await check_password_hash(payload.current_password, user.password)
+        if not is_correct:
             raise ValidationError('Current password is incorrect.')
         
-        user.set_password(payload.new_password)
-        user.save()
+        user.password = await hash_password(payload.new_password)
+        # request.user may be a cached snapshot, only the password is written back
+        await user.asave(update_fields=['password', 'updated_at'])
 
         # Send change-password email to user
         
@@ -84,39 +179,48 @@ class UserController(ControllerBase):
             status_code=200
         )
     
+    @route.post('/deactivate')
+    async def bulk_deactivate_users(self, payload: UserIdsInput):
+        users = await sync_to_async(deactivate_users)(payload.ids)
+
+        return self.create_response(
+            message={
+                'status': 'success',
+                'message': f'{len(users)} user(s) successfully deactivated.',
+                'data': [str(user.id) for user in users]
+            },
+            status_code=200
+        )
+
     @route.get('/{id}', response=UserOutSchema)
-    def get_user(self, id: str):
-        user = self._get_user_or_404(id)
-        return user
+    @conditional(etag=_get_user_etag, last_modified=_get_user_last_modified)
+    async def get_user(self, id: str):
+        schema = get_response_schema(self.context.request, UserOutSchema)
+        user = await self.aget_object_or_exception(
+            optimize_queryset(User.objects.all(), schema),
+            error_message="User does not exist.",
+            pk=id
+        )
+        return render_response(self, user, schema)
     
     @route.delete('/{id}')
-    def delete_user(self, id: str):
-        user = self._get_user_or_404(id)
+    async def delete_user(self, id: str):
+        user = await self._get_user_or_404(id)
         
         try:
             # Delete user from database
-            user.delete()
+            await user.adelete()
         except Exception as exc:
             self._handle_exception(exc)
 
         return self.create_response(message={'message':'User successfully deleted.'}, status_code=200)
     
     @route.post('/deactivate/{id}')
-    def deactivate_user(self, id: str):
-        user = self._get_user_or_404(id)
+    async def deactivate_user(self, id: str):
+        user = await self._get_user_or_404(id)
         
-        # Logs user out
-        outstanding_token_objs = OutstandingToken.objects.filter(user_id=user.id)
-        for token_obj in outstanding_token_objs:
-            token = RefreshToken(token_obj.token)
-            token.blacklist()
-
-        # Deactivate user
-        user.is_active = False
-        user.save()
-
-        # Send deactivation email to user
-        send_deactivation_email(user)
+        # Logs user out, deactivates it and queues its deactivation email
+        await sync_to_async(deactivate_user_account)(user)
 
         return self.create_response(
             message={
@@ -127,11 +231,11 @@ class UserController(ControllerBase):
         )
     
     @route.post('/activate/{id}')
-    def reactivate_user(self, id: str):
-        user = self._get_user_or_404(id)
+    async def reactivate_user(self, id: str):
+        user = await self._get_user_or_404(id)
 
         user.is_active = True
-        user.save()
+        await user.asave()
 
         # Send reactivation email to user
 
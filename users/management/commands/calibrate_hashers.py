@@ -0,0 +1,52 @@
+from pprint import pformat
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from core.hashers import CALIBRATORS, PASSWORD_HASHING, calibrate_hasher, describe_hash
+
+
+class Command(BaseCommand):
+    help = 'Measures the password hashers and prints the work factors that hash in the target time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=PASSWORD_HASHING.get('TARGET_TIME', 0.25) * 1000,
+            help='Milliseconds one hash should take.'
+        )
+        parser.add_argument(
+            '--algorithm',
+            action='append',
+            choices=CALIBRATORS,
+            default=None,
+            help='Hasher to calibrate, may be repeated. Defaults to all of them.'
+        )
+        parser.add_argument('--memory-cost', type=int, default=None, help='Argon2 memory in KiB.')
+        parser.add_argument('--parallelism', type=int, default=None, help='Argon2 lanes.')
+        parser.add_argument('--repeat', type=int, default=3, help='Hashes timed per measurement.')
+
+    def handle(self, *args, **options):
+        target = options['target_ms'] / 1000
+        work_factors = {}
+        for algorithm in options['algorithm'] or CALIBRATORS:
+            overrides = {}
+            if algorithm == 'argon2':
+                overrides = {
+                    name: options[name] for name in ('memory_cost', 'parallelism') if options[name] is not None
+                }
+            try:
+                work_factor, elapsed = calibrate_hasher(algorithm, target, options['repeat'], **overrides)
+            except ValueError as exc:
+                self.stderr.write(f'{algorithm}: {exc}')
+                continue
+
+            work_factors[algorithm] = work_factor
+            factors = ' '.join(f'{name}={value}' for name, value in work_factor.items())
+            note = ', over the target' if elapsed > target else ''
+            self.stdout.write(f'{algorithm} {factors}: {elapsed * 1000:.0f}ms{note}')
+
+        current = describe_hash(make_password('calibration-password'))
+        self.stdout.write(f'\nPasswords are currently hashed with {current}.')
+        self.stdout.write("Set PASSWORD_HASHING['WORK_FACTORS'] to:")
+        self.stdout.write(pformat(work_factors, sort_dicts=False))
+
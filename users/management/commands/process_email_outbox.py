@@ -0,0 +1,49 @@
+import logging
+import time
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from utils.email import process_outbox
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued outbox emails in batches, retrying failed sends with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Emails claimed per batch.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'EMAIL_OUTBOX', {}).get('POLL_INTERVAL', 5),
+            help='Seconds to sleep when the outbox is empty.'
+        )
+        parser.add_argument('--once', action='store_true', help='Drain the due emails once and exit.')
+
+    def handle(self, *args, **options):
+        # One connection serves back-to-back batches and is closed when idle
+        connection = get_connection(fail_silently=False)
+
+        try:
+            while True:
+                try:
+                    sent, failed = process_outbox(batch_size=options['batch_size'], connection=connection)
+                except Exception:
+                    # A database or mail backend outage must not stop the worker
+                    logger.exception('Processing the email outbox failed')
+                    connection.close()
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
+                    continue
+                connection.close()
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from users.services import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted tokens in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Tokens deleted per batch.')
+        parser.add_argument('--sleep', type=float, default=None, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        result = prune_expired_tokens(batch_size=options['batch_size'], sleep=options['sleep'])
+        self.stdout.write(
+            f'Removed {result.outstanding} outstanding and {result.blacklisted} blacklisted '
+            f'token(s) in {result.elapsed:.2f}s.'
+        )
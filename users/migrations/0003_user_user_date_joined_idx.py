@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined', 'id'], name='user_date_joined_idx'),
+        ),
+    ]
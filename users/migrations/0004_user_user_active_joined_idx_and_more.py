@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:56
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from core.operations import AddPostgresIndex
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_user_date_joined_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', 'date_joined', 'id'], name='user_active_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_verified', 'date_joined', 'id'], name='user_verified_joined_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='varchar_pattern_ops'), name='user_email_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='user_email_trgm_idx'),
+        ),
+    ]
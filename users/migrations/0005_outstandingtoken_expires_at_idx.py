@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+# OutstandingToken belongs to ninja_jwt, its index is created from here
+# without entering that app's migration state
+EXPIRES_AT_INDEX = models.Index(fields=['expires_at', 'id'], name='outstandingtoken_expires_idx')
+
+
+def add_expires_at_index(apps, schema_editor):
+    OutstandingToken = apps.get_model('token_blacklist', 'OutstandingToken')
+    schema_editor.add_index(OutstandingToken, EXPIRES_AT_INDEX)
+
+def remove_expires_at_index(apps, schema_editor):
+    OutstandingToken = apps.get_model('token_blacklist', 'OutstandingToken')
+    schema_editor.remove_index(OutstandingToken, EXPIRES_AT_INDEX)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_user_active_joined_idx_and_more'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_expires_at_index, remove_expires_at_index),
+    ]
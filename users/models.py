@@ -1,6 +1,9 @@
 import uuid
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .managers import UserManager
@@ -34,9 +37,44 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_date_joined_idx'),
+            models.Index(fields=['is_active', 'date_joined', 'id'], name='user_active_joined_idx'),
+            models.Index(fields=['is_verified', 'date_joined', 'id'], name='user_verified_joined_idx'),
+            # Email prefix and substring filters
+            models.Index(OpClass(Upper('email'), name='varchar_pattern_ops'), name='user_email_prefix_idx'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
     def get_context_string(self, context: str):
         return f'{context}{self.password[-6:]}{self.updated_at.strftime("%m%d%Y%H%M%S")}'.strip()
-    
+
+
+class OutboxEmail(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        SENT = 'sent', _('Sent')
+        FAILED = 'failed', _('Failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to_email = models.EmailField(_('recipient email address'))
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    status = models.CharField(_('status'), max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(_('delivery attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to_email}'
@@ -1,10 +1,12 @@
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission, Group
-from ninja import Schema, ModelSchema
+from ninja import Field, Schema, ModelSchema
 import ninja_jwt.exceptions as exceptions
-from ninja_jwt.schema import TokenObtainPairInputSchema
-from pydantic import EmailStr, model_validator, field_validator
+from pydantic import UUID4, EmailStr, model_validator
+from core.filters import IndexedFilterSchema
+from core.projection import register_reference_schema
 from utils.helpers import is_password_strong_enough
 
 
@@ -24,16 +26,9 @@ class GroupSchema(Schema):
 
 
 class UserInSchema(Schema):
+    # Uniqueness is checked by the view, validators can't query from async routes
     email: EmailStr
 
-    @field_validator('email')
-    def validate_email_uniqueness(cls, value, values):
-        try:
-            User.objects.get(email=value)
-            raise exceptions.ValidationError('Email already exists')
-        except User.DoesNotExist:
-            return value
-
 
 class UserOutSchema(ModelSchema):
     groups: List[GroupSchema] = []
@@ -42,17 +37,53 @@ class UserOutSchema(ModelSchema):
         fields = ['id','email','is_staff','is_active','is_verified','date_joined']
 
 
+class UserRefSchema(Schema):
+    id: UUID4
+    email: str
+
+# Nested users are rendered as {id, email} unless expanded
+register_reference_schema(UserOutSchema, UserRefSchema)
+
+
+class UserFilterSchema(IndexedFilterSchema):
+    model = User
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    group: Optional[str] = Field(None, q='groups__name')
+    date_joined_after: Optional[datetime] = Field(None, q='date_joined__gte')
+    date_joined_before: Optional[datetime] = Field(None, q='date_joined__lt')
+    email_prefix: Optional[str] = Field(None, q='email__istartswith')
+    # Trigram indexes need at least 3 characters to narrow the search
+    email_contains: Optional[str] = Field(None, min_length=3, q='email__icontains')
+    ordering: Optional[Literal['date_joined', '-date_joined', 'email', '-email']] = None
+
+
+class UserIdsInput(Schema):
+    ids: List[UUID4]
+
+
+class BulkRegisterInput(Schema):
+    emails: List[str]
+
+
+class BulkRegisterResult(Schema):
+    row: int
+    email: str
+    status: str
+    id: Optional[UUID4] = None
+    message: Optional[str] = None
+
+
 class LoginOutSchema(Schema):
     status: str
     message: str
     user: UserOutSchema
 
 
-class LoginInputSchema(TokenObtainPairInputSchema):
-    def get_response_schema_init_kwargs(self) -> dict:
-        token_data = super().get_response_schema_init_kwargs()
-        token_data.update(user=UserOutSchema.from_orm(self._user))
-        return token_data
+class LoginInputSchema(Schema):
+    # Checked by the view on the hashing pool, not by a validator
+    email: str = Field(..., min_length=1)
+    password: str = Field(..., min_length=1)
 
 
 class PasswordCheckMixin:
@@ -0,0 +1,376 @@
+import logging
+import time
+from typing import NamedTuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, update_last_login
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+from django.utils import timezone
+from ninja_jwt.settings import api_settings as jwt_settings
+from ninja_jwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from ninja_jwt.tokens import RefreshToken
+from pydantic import EmailStr, TypeAdapter, ValidationError as PydanticValidationError
+from core.cache import invalidate_models
+from core.hashers import describe_hash
+from core.hashing import check_password_hash, hash_password
+from users.blacklist import publish_blacklist_change
+from users.cache import ROLE_CLAIM, get_role_claims, get_user_version, invalidate_user_snapshot
+from utils.email import (
+    send_deactivation_email,
+    send_deactivation_emails,
+    send_successful_password_reset_email,
+    send_successful_verification_email,
+    send_verification_email,
+    send_verification_emails
+)
+from utils.scheduler import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_email_adapter = TypeAdapter(EmailStr)
+
+# Fields the directory search matches, each needs the pattern and pg_trgm
+# indexes on UPPER(field) that `email` has
+SEARCH_FIELDS = ('email',)
+
+# pg_trgm can't narrow a search on fewer characters
+TRIGRAM_MIN_LENGTH = 3
+
+# Whether pg_trgm is installed, by database alias, checked on first search
+TRIGRAM_SUPPORT = {}
+
+
+class PruneResult(NamedTuple):
+    outstanding: int
+    blacklisted: int
+    elapsed: float
+
+
+def blacklist_user_tokens(user_ids):
+    """
+    Blacklists every unexpired outstanding token of `user_ids` that is not
+    blacklisted yet, in one insert and without decoding any JWT.
+
+    Returns the number of candidate tokens, those found unblacklisted by the
+    query. A token blacklisted concurrently by another transaction is
+    skipped by the insert but still counted, the database doesn't report
+    which rows of an insert ignoring conflicts were written.
+    """
+    token_ids = OutstandingToken.objects.filter(
+        user_id__in=user_ids,
+        expires_at__gt=timezone.now(),
+        blacklistedtoken__isnull=True
+    ).order_by().values_list('id', flat=True)
+
+    blacklisted = BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+        ignore_conflicts=True
+    )
+    if blacklisted:
+        transaction.on_commit(publish_blacklist_change)
+    return len(blacklisted)
+
+def deactivate_users(user_ids):
+    """
+    Logs out and deactivates every active user in `user_ids` in a single
+    transaction, then queues their deactivation emails.
+
+    Returns the deactivated users.
+    """
+    with transaction.atomic():
+        users = list(User.objects.select_for_update().filter(pk__in=user_ids, is_active=True))
+        if not users:
+            return users
+
+        user_ids = [user.pk for user in users]
+        blacklist_user_tokens(user_ids)
+
+        # `update` skips save signals, so publish the new versions ourselves
+        now = timezone.now()
+        User.objects.filter(pk__in=user_ids).update(is_active=False, updated_at=now)
+        for user in users:
+            user.is_active = False
+            user.updated_at = now
+            invalidate_user_snapshot(user.pk, get_user_version(user))
+        invalidate_models(User)
+
+        send_deactivation_emails(users)
+
+    return users
+
+def deactivate_user_account(user):
+    """
+    Logs `user` out and deactivates it, queuing its deactivation email in
+    the same transaction.
+    """
+    with transaction.atomic():
+        blacklist_user_tokens([user.pk])
+        user.is_active = False
+        user.save()
+        send_deactivation_email(user)
+
+def register_user_account(email):
+    """
+    Creates an unverified `employee` account for `email` and queues its
+    verification email in the same transaction.
+    """
+    with transaction.atomic():
+        user = User.objects.create_user(email)
+        Group.objects.get(name='employee').user_set.add(user)
+        send_verification_email(user)
+    return user
+
+async def authenticate_user(email, password):
+    """
+    Async counterpart of `authenticate()` for the email and password of
+    `ModelBackend`. The user is read with the async ORM and the password
+    checked on the hashing pool. The hash's work factor and the time the
+    check took are logged, and hashes made with an outdated hasher or work
+    factor are upgraded on success.
+
+    Returns the user, or None when the credentials are wrong or the user is
+    inactive.
+    """
+    try:
+        user = await User._default_manager.aget(**{User.USERNAME_FIELD: email})
+    except User.DoesNotExist:
+        # Unknown emails cost a hash too, so they can't be told apart by timing
+        await hash_password(password)
+        return None
+
+    started = time.monotonic()
+    is_correct, must_update = await check_password_hash(password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+
+    work_factor = describe_hash(user.password)
+    logger.info(
+        'Checked the password of user %s, %s, in %.0fms',
+        user.pk, work_factor, (time.monotonic() - started) * 1000
+    )
+    if must_update:
+        user.password = await hash_password(password)
+        await user.asave(update_fields=['password', 'updated_at'])
+        logger.info(
+            'Upgraded the password hash of user %s from %s to %s',
+            user.pk, work_factor, describe_hash(user.password)
+        )
+    return user
+
+def get_login_tokens(user) -> dict:
+    """
+    Issues the refresh and access tokens of a login, with the user's roles
+    embedded when `AUTH_USER_CACHE['ROLE_CLAIMS']` is on.
+    """
+    refresh = RefreshToken.for_user(user)
+    if getattr(settings, 'AUTH_USER_CACHE', {}).get('ROLE_CLAIMS', False):
+        # Embed the user's roles so permission checks can skip the roles cache
+        refresh[ROLE_CLAIM] = get_role_claims(user)
+    if jwt_settings.UPDATE_LAST_LOGIN:
+        update_last_login(None, user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+def verify_user_account(user, password_hash):
+    with transaction.atomic():
+        user.is_active = True
+        user.is_verified = True
+        user.password = password_hash
+        user.save()
+        send_successful_verification_email(user)
+
+def reset_user_password(user, password_hash):
+    with transaction.atomic():
+        user.password = password_hash
+        user.save()
+        send_successful_password_reset_email(user)
+
+def _any_field(lookup, value) -> Q:
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__{lookup}': value})
+    return condition
+
+def _check_trigram_support(alias) -> bool:
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+async def _has_trigram_support(alias=DEFAULT_DB_ALIAS) -> bool:
+    if alias not in TRIGRAM_SUPPORT:
+        TRIGRAM_SUPPORT[alias] = await sync_to_async(_check_trigram_support)(alias)
+    return TRIGRAM_SUPPORT[alias]
+
+async def search_users(term: str, limit: int) -> list:
+    """
+    Typeahead search of the user directory, returning the `id` and search
+    fields of at most `limit` users, best matches first.
+
+    On PostgreSQL with pg_trgm, terms of 3 characters or more are ranked by
+    trigram word similarity and matched through the GIN trigram indexes,
+    which tolerates typos. Shorter terms are prefix matches read in order
+    from the pattern indexes. Without pg_trgm, such as on SQLite test runs,
+    longer terms fall back to substring matches with prefix matches first.
+    """
+    term = term.strip()
+    if not term:
+        return []
+
+    queryset = User.objects.all()
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        queryset = (
+            queryset.filter(_any_field('istartswith', term))
+            .order_by(*(Upper(field) for field in SEARCH_FIELDS))
+        )
+    elif await _has_trigram_support():
+        # Compare UPPER(field) like the indexes do
+        term = term.upper()
+        queryset = queryset.annotate(**{f'{field}_upper': Upper(field) for field in SEARCH_FIELDS})
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}_upper__trigram_word_similar': term})
+        similarities = [TrigramWordSimilarity(term, Upper(field)) for field in SEARCH_FIELDS]
+        rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        queryset = queryset.filter(condition).annotate(rank=rank).order_by('-rank', *SEARCH_FIELDS)
+    else:
+        rank = Case(When(_any_field('istartswith', term), then=Value(1)), default=Value(0))
+        queryset = (
+            queryset.filter(_any_field('icontains', term))
+            .annotate(rank=rank)
+            .order_by('-rank', *SEARCH_FIELDS)
+        )
+
+    return [row async for row in queryset.values('id', *SEARCH_FIELDS)[:limit]]
+
+def register_users(emails):
+    """
+    Creates an unverified `employee` account for every new address in
+    `emails` with a fixed number of queries whatever the batch size, and
+    queues their verification emails in the same transaction.
+
+    Returns one result per input row, in input order. The status of a row
+    is `created`, `exists`, `duplicate` (repeated in the batch) or `invalid`.
+    """
+    batch_size = getattr(settings, 'BULK_OPERATIONS', {}).get('BATCH_SIZE', 500)
+    results = {}
+    rows_by_email = {}
+    for row, email in enumerate(emails, start=1):
+        try:
+            email = User.objects.normalize_email(_email_adapter.validate_python(email.strip()))
+        except PydanticValidationError as exc:
+            results[row] = {'row': row, 'email': email, 'status': 'invalid', 'message': exc.errors()[0]['msg']}
+            continue
+        if email in rows_by_email:
+            results[row] = {'row': row, 'email': email, 'status': 'duplicate'}
+            continue
+        rows_by_email[email] = row
+
+    existing = set(User.objects.filter(email__in=list(rows_by_email)).values_list('email', flat=True))
+    new_users = []
+    for email, row in rows_by_email.items():
+        if email in existing:
+            results[row] = {'row': row, 'email': email, 'status': 'exists'}
+            continue
+        user = User(email=email)
+        user.set_unusable_password()
+        new_users.append(user)
+
+    if new_users:
+        with transaction.atomic():
+            # Addresses registered concurrently since the check are skipped
+            User.objects.bulk_create(new_users, batch_size=batch_size, ignore_conflicts=True)
+            created_ids = set(
+                User.objects.filter(pk__in=[user.pk for user in new_users]).values_list('pk', flat=True)
+            )
+            created = [user for user in new_users if user.pk in created_ids]
+
+            group = Group.objects.get(name='employee')
+            Membership = User.groups.through
+            Membership.objects.bulk_create(
+                [Membership(user_id=user.pk, group_id=group.pk) for user in created],
+                batch_size=batch_size
+            )
+            send_verification_emails(created)
+            invalidate_models(User)
+
+        for user in new_users:
+            row = rows_by_email[user.email]
+            if user.pk in created_ids:
+                results[row] = {'row': row, 'email': user.email, 'status': 'created', 'id': user.pk}
+            else:
+                results[row] = {'row': row, 'email': user.email, 'status': 'exists'}
+
+    return [results[row] for row in sorted(results)]
+
+def prune_expired_tokens(batch_size=None, sleep=None):
+    """
+    Deletes expired outstanding tokens and their blacklist entries. Batches
+    of at most `batch_size` rows are found by walking the
+    `(expires_at, id)` index from the oldest expiry and deleted in short
+    transactions, sleeping `sleep` seconds in between so no run holds locks
+    for long.
+    """
+    config = getattr(settings, 'TOKEN_PRUNING', {})
+    batch_size = batch_size or config.get('BATCH_SIZE', 1000)
+    sleep = config.get('SLEEP', 0.1) if sleep is None else sleep
+
+    started = time.monotonic()
+    now = timezone.now()
+    outstanding = blacklisted = 0
+    after = Q()
+
+    while True:
+        rows = list(
+            OutstandingToken.objects.filter(after, expires_at__lte=now)
+            .order_by('expires_at', 'pk')
+            .values_list('expires_at', 'pk')[:batch_size]
+        )
+        if not rows:
+            break
+        # Resume after the last row seen, rows expiring at the same instant
+        # are told apart by their id
+        last_expires_at, last_id = rows[-1]
+        after = Q(expires_at__gt=last_expires_at) | Q(expires_at=last_expires_at, pk__gt=last_id)
+        token_ids = [pk for _, pk in rows]
+
+        with transaction.atomic():
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=token_ids).delete()[0]
+            outstanding += OutstandingToken.objects.filter(pk__in=token_ids).only('pk').delete()[0]
+
+        if len(rows) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    return PruneResult(outstanding, blacklisted, time.monotonic() - started)
+
+def _run_token_pruning():
+    result = prune_expired_tokens()
+    logger.info(
+        'Pruned %s outstanding and %s blacklisted token(s) in %.2fs',
+        result.outstanding, result.blacklisted, result.elapsed
+    )
+
+def start_token_pruning_scheduler():
+    """
+    Starts the in-process pruning thread when `TOKEN_PRUNING['INTERVAL']`
+    is set. Returns the thread, or None when scheduling is disabled. Only
+    one process prunes per interval when the default cache is shared
+    through Redis; see `PeriodicTask` for the other backends.
+    """
+    interval = getattr(settings, 'TOKEN_PRUNING', {}).get('INTERVAL')
+    if not interval:
+        return None
+
+    task = PeriodicTask('prune-expired-tokens', interval, _run_token_pruning)
+    task.start()
+    return task
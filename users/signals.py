@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from ninja_jwt.token_blacklist.models import BlacklistedToken
+from core.cache import M2M_CHANGE_ACTIONS
+from users.blacklist import blacklist_filter, publish_blacklist_change
+from users.cache import (
+    get_user_version,
+    invalidate_all_roles,
+    invalidate_user_roles,
+    invalidate_user_snapshot
+)
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def publish_user_version(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk, get_user_version(instance))
+
+
+@receiver(post_delete, sender=User)
+def drop_user_snapshot(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk)
+    invalidate_user_roles(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def drop_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in M2M_CHANGE_ACTIONS:
+        return
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set:
+        user_ids = pk_set
+    elif action == 'pre_clear':
+        # Clearing from the group/permission side does not report the affected users
+        user_ids = instance.user_set.values_list('pk', flat=True)
+    else:
+        user_ids = []
+
+    for user_id in user_ids:
+        invalidate_user_snapshot(user_id)
+        invalidate_user_roles(user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def drop_roles_on_group_permission_change(sender, action, **kwargs):
+    if action in M2M_CHANGE_ACTIONS:
+        invalidate_all_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def drop_roles_on_group_change(sender, **kwargs):
+    invalidate_all_roles()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def publish_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        blacklist_filter.add(instance.token.jti, instance.token.expires_at)
+        transaction.on_commit(publish_blacklist_change)
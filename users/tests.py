@@ -1,3 +1,536 @@
-from django.test import TestCase  # noqa: F401
+import io
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+import bcrypt
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from ninja_jwt.exceptions import TokenError
+from ninja_jwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from ninja_jwt.tokens import AccessToken, RefreshToken
+from core import hashing, throttling
+from core.authentication import CustomJWTAuth
+from core.hashing import HashingUnavailable, run_hashing
+from core.throttling import CacheBucketStore, TokenBucketThrottle
+from core.permission import IsSuperAdmin
+from users.blacklist import FilteredRefreshToken, blacklist_filter, publish_blacklist_change
+from users.cache import (
+    apply_role_claims, get_roles_version, get_user_roles, get_user_snapshot, invalidate_all_roles,
+    invalidate_user_roles, store_user_snapshot
+)
+from users.models import OutboxEmail
+from users.services import (
+    _check_trigram_support, blacklist_user_tokens, get_login_tokens, prune_expired_tokens, register_users
+)
+from utils.email import process_outbox
+from utils.helpers import USER_VERIFY_ACCOUNT, check_account_token, make_account_token
 
-# Create your tests here.
+
+User = get_user_model()
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('jane@example.com', 'Passw0rd!x', is_active=True)
+
+    def test_snapshot_is_dropped_when_the_user_is_saved(self):
+        store_user_snapshot(self.user)
+        self.assertEqual(get_user_snapshot(self.user.pk).email, 'jane@example.com')
+
+        self.user.is_verified = True
+        self.user.save()
+        self.assertIsNone(get_user_snapshot(self.user.pk))
+
+    def test_snapshot_is_dropped_when_the_user_is_deleted(self):
+        store_user_snapshot(self.user)
+        self.user.delete()
+        self.assertIsNone(get_user_snapshot(self.user.pk))
+
+    def test_snapshot_is_a_copy(self):
+        store_user_snapshot(self.user)
+        snapshot = get_user_snapshot(self.user.pk)
+        snapshot.email = 'changed@example.com'
+        self.assertEqual(get_user_snapshot(self.user.pk).email, 'jane@example.com')
+
+    def test_cached_user_authenticates_without_queries(self):
+        token = AccessToken.for_user(self.user)
+        CustomJWTAuth().get_user(token)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(CustomJWTAuth().get_user(token).pk, self.user.pk)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserRolesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('jane@example.com', 'Passw0rd!x', is_active=True)
+
+    def roles(self):
+        # A fresh instance, roles are memoized on the one they were read for
+        return get_user_roles(User.objects.get(pk=self.user.pk))
+
+    def test_roles_follow_group_membership(self):
+        group = Group.objects.get(name='employee')
+        self.assertEqual(self.roles().groups, frozenset())
+
+        self.user.groups.add(group)
+        self.assertEqual(self.roles().groups, {'employee'})
+
+        # Cleared from the group's side, the users are only known before the clear
+        group.user_set.clear()
+        self.assertEqual(self.roles().groups, frozenset())
+
+    def test_roles_follow_group_permissions(self):
+        group = Group.objects.get(name='employee')
+        self.user.groups.add(group)
+        self.assertEqual(self.roles().permissions, frozenset())
+
+        group.permissions.add(Permission.objects.get(codename='view_user'))
+        self.assertEqual(self.roles().permissions, {'users.view_user'})
+
+    def test_roles_versions_are_bumped_per_user_and_globally(self):
+        other = User.objects.create_user('john@example.com', 'Passw0rd!x')
+        versions = get_roles_version(self.user.pk), get_roles_version(other.pk)
+        self.assertEqual((get_roles_version(self.user.pk), get_roles_version(other.pk)), versions)
+
+        invalidate_user_roles(self.user.pk)
+        self.assertNotEqual(get_roles_version(self.user.pk), versions[0])
+        self.assertEqual(get_roles_version(other.pk), versions[1])
+
+        invalidate_all_roles()
+        self.assertNotEqual(get_roles_version(other.pk), versions[1])
+
+    def test_superadmin_check_uses_cached_roles(self):
+        Group.objects.get(name='superadmin').user_set.add(self.user)
+        self.roles()
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(IsSuperAdmin().has_permission(SimpleNamespace(user=user), None))
+
+    def test_non_members_are_refused(self):
+        request = SimpleNamespace(user=User.objects.get(pk=self.user.pk))
+        self.assertFalse(IsSuperAdmin().has_permission(request, None))
+
+    @override_settings(AUTH_USER_CACHE={'ROLE_CLAIMS': True})
+    def test_role_claims_are_trusted_until_roles_change(self):
+        Group.objects.get(name='superadmin').user_set.add(self.user)
+        access = RefreshToken(get_login_tokens(self.user)['refresh']).access_token
+
+        user = User.objects.get(pk=self.user.pk)
+        apply_role_claims(user, access)
+        self.assertEqual(user._cached_roles.groups, {'superadmin'})
+
+        Group.objects.get(name='superadmin').user_set.remove(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        apply_role_claims(user, access)
+        self.assertFalse(hasattr(user, '_cached_roles'))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AccountTokenTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('jane@example.com', 'Passw0rd!x')
+        self.context = self.user.get_context_string(USER_VERIFY_ACCOUNT)
+
+    def test_round_trip(self):
+        token = make_account_token(self.context)
+        self.assertTrue(check_account_token(self.context, token))
+        self.assertFalse(check_account_token(self.user.get_context_string('password-reset'), token))
+        self.assertFalse(check_account_token(self.context, token[:-1] + ('0' if token[-1] != '0' else '1')))
+
+    def test_token_stops_verifying_once_the_user_changes(self):
+        token = make_account_token(self.context)
+        self.user.set_password('N3w-Passw0rd!')
+        self.user.save()
+        self.assertFalse(check_account_token(self.user.get_context_string(USER_VERIFY_ACCOUNT), token))
+
+    @override_settings(ACCOUNT_TOKENS={'MAX_AGE': 60})
+    def test_token_expires(self):
+        with mock.patch('utils.helpers.time.time', return_value=1_000_000):
+            token = make_account_token(self.context)
+        with mock.patch('utils.helpers.time.time', return_value=1_000_060):
+            self.assertTrue(check_account_token(self.context, token))
+        with mock.patch('utils.helpers.time.time', return_value=1_000_061):
+            self.assertFalse(check_account_token(self.context, token))
+
+    def test_legacy_bcrypt_tokens_are_accepted_until_the_cutoff(self):
+        token = bcrypt.hashpw(self.context.encode(), bcrypt.gensalt(4)).decode()
+        with override_settings(ACCOUNT_TOKENS={'LEGACY_BCRYPT_UNTIL': '2999-01-01'}):
+            self.assertTrue(check_account_token(self.context, token))
+            self.assertFalse(check_account_token('other context', token))
+        with override_settings(ACCOUNT_TOKENS={'LEGACY_BCRYPT_UNTIL': '2000-01-01'}):
+            self.assertFalse(check_account_token(self.context, token))
+
+
+class UnreachableBackend(EmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError('Connection refused')
+
+
+class RejectingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise OSError('Mailbox unavailable')
+
+
+@override_settings(EMAIL_OUTBOX={'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 3, 'RETRY_BACKOFF': 30, 'CLAIM_TIMEOUT': 300})
+class EmailOutboxTests(TestCase):
+
+    def queue(self, count, **fields):
+        return OutboxEmail.objects.bulk_create([
+            OutboxEmail(to_email=f'user{index}@example.com', subject='Hello', body='Body', **fields)
+            for index in range(count)
+        ])
+
+    def test_due_emails_are_sent_in_batches(self):
+        self.queue(3)
+        self.queue(1, next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(process_outbox(), (2, 0))
+        self.assertEqual(process_outbox(), (1, 0))
+        self.assertEqual(process_outbox(), (0, 0))
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            'user0@example.com', 'user1@example.com', 'user2@example.com'
+        ])
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count(), 3)
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        email, = self.queue(1, attempts=1)
+
+        started = timezone.now()
+        with self.assertLogs('utils.email', 'WARNING'):
+            self.assertEqual(process_outbox(connection=RejectingBackend()), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), (OutboxEmail.Status.PENDING, 2, 'Mailbox unavailable'))
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=60))
+        # Not due again until the backoff has passed
+        self.assertEqual(process_outbox(), (0, 0))
+
+    def test_last_attempt_fails_permanently(self):
+        email, = self.queue(1, attempts=2)
+
+        with self.assertLogs('utils.email', 'WARNING'):
+            process_outbox(connection=RejectingBackend())
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.FAILED, 3))
+
+    def test_unreachable_server_backs_off_the_claimed_rows(self):
+        self.queue(3)
+
+        with self.assertLogs('utils.email', 'WARNING') as logs:
+            self.assertEqual(process_outbox(connection=UnreachableBackend()), (0, 2))
+        self.assertIn('Connection refused', logs.output[0])
+
+        self.assertEqual(
+            sorted(OutboxEmail.objects.values_list('attempts', flat=True)), [0, 1, 1]
+        )
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING).count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_survives_backend_errors(self):
+        self.queue(1)
+
+        with self.settings(EMAIL_BACKEND='users.tests.UnreachableBackend'), self.assertLogs('utils.email', 'WARNING'):
+            call_command('process_email_outbox', '--once', stdout=io.StringIO())
+        with mock.patch(
+            'users.management.commands.process_email_outbox.process_outbox', side_effect=RuntimeError('database is gone')
+        ), self.assertLogs('users.management.commands.process_email_outbox', 'ERROR'):
+            call_command('process_email_outbox', '--once', stdout=io.StringIO())
+
+        self.assertEqual(OutboxEmail.objects.get().attempts, 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TokenPruningTests(TestCase):
+
+    def test_expired_tokens_are_deleted_in_batches(self):
+        user = User.objects.create_user('jane@example.com', 'Passw0rd!x')
+        now = timezone.now()
+        # Several rows expire at the same instant, batches must not skip any
+        expired = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=user, jti=f'expired-{index}', token='t', expires_at=now - timedelta(days=index % 3))
+            for index in range(7)
+        ])
+        live = OutstandingToken.objects.create(user=user, jti='live', token='t', expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in (*expired[:2], live)])
+
+        result = prune_expired_tokens(batch_size=3, sleep=0)
+
+        self.assertEqual((result.outstanding, result.blacklisted), (7, 2))
+        self.assertQuerySetEqual(OutstandingToken.objects.all(), [live])
+        self.assertQuerySetEqual(BlacklistedToken.objects.values_list('token', flat=True), [live.pk])
+
+    def test_pruning_command_reports_counts(self):
+        out = io.StringIO()
+        call_command('prune_tokens', stdout=out)
+        self.assertIn('Removed 0 outstanding and 0 blacklisted', out.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TokenBlacklistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.clear()
+        self.user = User.objects.create_user('jane@example.com', 'Passw0rd!x')
+        self.token = str(FilteredRefreshToken.for_user(self.user))
+        # Loads the filter before anything is blacklisted
+        FilteredRefreshToken(self.token)
+
+    def test_revoked_token_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(blacklist_user_tokens([self.user.pk]), 1)
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(self.token)
+
+    def test_token_blacklisted_by_another_process_is_rejected(self):
+        # Bulk inserts send no signal, the writer publishes the change itself
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(user=self.user))])
+        publish_blacklist_change()
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(self.token)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_process_local_cache_checks_the_database(self):
+        self.assertFalse(blacklist_filter.trusts_misses())
+        FilteredRefreshToken(self.token)
+
+        # No version change can reach this process, the database is asked
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(user=self.user))])
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(self.token)
+
+    def test_filter_can_be_turned_off(self):
+        with mock.patch('users.blacklist.TOKEN_BLACKLIST', {'FILTER': False}):
+            self.assertFalse(blacklist_filter.trusts_misses())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserImportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('existing@example.com', 'Passw0rd!x')
+
+    def test_rows_are_reported_in_order(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            results = register_users([
+                'new@example.com', 'not-an-email', 'existing@example.com', 'new@example.com'
+            ])
+
+        self.assertEqual(
+            [(result['row'], result['status']) for result in results],
+            [(1, 'created'), (2, 'invalid'), (3, 'exists'), (4, 'duplicate')]
+        )
+        self.assertTrue(User.objects.filter(email='new@example.com', is_verified=False).exists())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserApiTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin@example.com', 'Passw0rd!x')
+        # The access token is read from its cookie, the header only has to be present
+        access = get_login_tokens(self.admin)['access']
+        self.client.cookies['access_token'] = self.async_client.cookies['access_token'] = access
+        self.headers = {'Authorization': 'Bearer cookie'}
+
+    def get(self, path, params=None, **headers):
+        return self.client.get(path, params, headers={**self.headers, **headers})
+
+
+class ConditionalGetTests(UserApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('jane@example.com', 'Passw0rd!x')
+        self.path = f'/api/users/{self.user.pk}'
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.get(self.path)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get(self.path, **{'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_saving_the_user_changes_its_etag(self):
+        etag = self.get(self.path)['ETag']
+        self.user.first_name = 'Jane'
+        self.user.save()
+
+        response = self.get(self.path, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.get(self.path)['Last-Modified']
+        self.assertEqual(self.get(self.path, **{'If-Modified-Since': last_modified}).status_code, 304)
+
+        earlier = http_date((self.user.updated_at - timedelta(hours=1)).timestamp())
+        self.assertEqual(self.get(self.path, **{'If-Modified-Since': earlier}).status_code, 200)
+
+    def test_projections_have_their_own_etags(self):
+        self.assertNotEqual(self.get(self.path)['ETag'], self.get(self.path, {'fields': 'email'})['ETag'])
+
+
+class UserSearchTests(UserApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for email in ('jane.doe@example.com', 'john.smith@example.com', 'mary.jane@example.com'):
+            User.objects.create_user(email, 'Passw0rd!x')
+
+    def search(self, q, **params):
+        response = self.get('/api/users/search', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [user['email'] for user in response.json()]
+
+    def test_substring_fallback_without_trigrams(self):
+        # Databases without pg_trgm match substrings, prefix matches first
+        with mock.patch.dict('users.services.TRIGRAM_SUPPORT', {'default': False}):
+            self.assertEqual(self.search('JANE'), ['jane.doe@example.com', 'mary.jane@example.com'])
+            self.assertEqual(self.search('smith'), ['john.smith@example.com'])
+            self.assertEqual(self.search('nobody'), [])
+
+    def test_short_terms_are_prefix_matches(self):
+        self.assertEqual(self.search('ja'), ['jane.doe@example.com'])
+
+    def test_limit_is_applied_and_bounded(self):
+        self.assertEqual(len(self.search('example', limit=2)), 2)
+        response = self.get('/api/users/search', {'q': 'example', 'limit': 1000})
+        self.assertEqual(response.status_code, 400)
+
+    def test_trigram_matches_tolerate_typos(self):
+        if not _check_trigram_support('default'):
+            self.skipTest('Trigram matching needs pg_trgm')
+        self.assertEqual(self.search('jnae.doe')[:1], ['jane.doe@example.com'])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Buckets are kept per process, start every test with empty ones
+        throttling._store = None
+        User.objects.create_user('jane@example.com', 'Passw0rd!x', is_active=True)
+
+    def login(self, email, password):
+        return self.client.post(
+            '/api/auth/login', {'email': email, 'password': password}, content_type='application/json'
+        )
+
+    def test_account_is_throttled_with_retry_after(self):
+        for _ in range(5):
+            self.assertEqual(self.login('jane@example.com', 'wrong').status_code, 401)
+
+        response = self.login('jane@example.com', 'wrong')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+        # Other accounts keep their own bucket
+        self.assertEqual(self.login('john@example.com', 'wrong').status_code, 401)
+
+    def test_outdated_hashes_are_upgraded_on_login(self):
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.ScryptPasswordHasher', *FAST_HASHERS]):
+            self.assertEqual(self.login('jane@example.com', 'wrong').status_code, 401)
+            self.assertTrue(User.objects.get(email='jane@example.com').password.startswith('md5$'))
+
+            self.assertEqual(self.login('jane@example.com', 'Passw0rd!x').status_code, 200)
+            user = User.objects.get(email='jane@example.com')
+            self.assertTrue(user.password.startswith('scrypt$'))
+            self.assertTrue(user.check_password('Passw0rd!x'))
+
+    def test_inactive_users_are_not_rehashed(self):
+        User.objects.filter(email='jane@example.com').update(is_active=False)
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.ScryptPasswordHasher', *FAST_HASHERS]):
+            self.assertEqual(self.login('jane@example.com', 'Passw0rd!x').status_code, 401)
+        self.assertTrue(User.objects.get(email='jane@example.com').password.startswith('md5$'))
+
+    def test_full_hashing_queue_turns_logins_away(self):
+        with mock.patch.object(hashing, '_slots', threading.BoundedSemaphore(1)):
+            hashing._slots.acquire()
+            response = self.login('jane@example.com', 'Passw0rd!x')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class HashingPoolTests(TestCase):
+
+    def test_runs_jobs_and_frees_their_slot(self):
+        with mock.patch.object(hashing, '_slots', threading.BoundedSemaphore(1)):
+            self.assertEqual(async_to_sync(run_hashing)(len, 'secret'), 6)
+            self.assertEqual(async_to_sync(run_hashing)(len, 'other'), 5)
+
+    def test_full_queue_raises_with_a_wait(self):
+        with mock.patch.object(hashing, '_slots', threading.BoundedSemaphore(1)):
+            hashing._slots.acquire()
+            with self.assertRaises(HashingUnavailable) as raised:
+                async_to_sync(run_hashing)(len, 'secret')
+
+        self.assertEqual(raised.exception.wait, 1)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    scope = 'test'
+
+    def get_key(self, request):
+        return 'jane@example.com'
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SharedThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def take(self, host_uptime, elapsed):
+        # Every host has its own store and a monotonic clock counting from
+        # its own boot, their wall clocks agree
+        with (
+            mock.patch('core.throttling._store', CacheBucketStore()),
+            mock.patch('time.monotonic', return_value=host_uptime + elapsed),
+            mock.patch('time.time', return_value=1_800_000_000 + elapsed),
+        ):
+            throttle = EmailThrottle(rate='2/m')
+            return throttle.allow_request(None), throttle.wait()
+
+    def test_hosts_share_buckets(self):
+        first, second = 50.0, 900_000.0
+        self.assertEqual(self.take(first, 0), (True, 0.0))
+        self.assertEqual(self.take(second, 1), (True, 0.0))
+
+        allowed, wait = self.take(first, 2)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 28)
+
+        self.assertEqual(self.take(second, 31), (True, 0.0))
@@ -0,0 +1,309 @@
+import asyncio
+import inspect
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe in-process mapping that evicts the least recently
+    used entry once `max_entries` is reached. Entries optionally expire
+    after `timeout` seconds.
+    """
+    def __init__(self, max_entries=1024, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# In-process tiers and their counters, by TieredCache location. Django creates
+# cache instances per thread, the tiers are shared by every thread of a process
+_local_tiers = {}
+_tier_stats = {}
+_tiers_lock = Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend layering a bounded in-process LRU (L1) in front of
+    a shared cache (L2), the `SHARED_CACHE` alias. Every read goes through
+    L1 and every write goes to both.
+
+    Only keys starting with one of `LOCAL_PREFIXES` are kept in L1. Those
+    keys must include the version of the data they hold, so they never
+    change once written. The version keys themselves always live in L2 only.
+    A writer bumps a version in L2, and every process then reads the new
+    key instead of its stale copy. No L1 needs to be notified.
+
+    `get_or_set` takes a lock in L2 while computing a missing value. Other
+    callers wait for the lock holder instead of computing the value too.
+    The lock is only as good as L2's `add`: Redis and Memcached add
+    atomically, the file-based cache doesn't, so with it two processes may
+    still both compute a value. The lock then only reduces duplicate work.
+    `aget_or_set` also accepts coroutine functions as defaults.
+
+    Values kept in L1 are shared, callers must not mutate them.
+    """
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        self.shared_alias = options.pop('SHARED_CACHE')
+        self.local_prefixes = tuple(options.pop('LOCAL_PREFIXES', ()))
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 300)
+        self.lock_timeout = options.pop('LOCK_TIMEOUT', 10)
+        self.lock_poll_interval = options.pop('LOCK_POLL_INTERVAL', 0.05)
+        max_entries = options.pop('LOCAL_MAX_ENTRIES', 4096)
+        super().__init__({**params, 'OPTIONS': options})
+
+        with _tiers_lock:
+            if location not in _local_tiers:
+                _local_tiers[location] = LRUCache(max_entries=max_entries, timeout=self.local_timeout)
+                _tier_stats[location] = Counter()
+        self.local = _local_tiers[location]
+        self._stats = _tier_stats[location]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def stats(self) -> dict:
+        """
+        Returns the L1 hits, L2 hits, misses and lock waits of this process.
+        """
+        return {name: self._stats[name] for name in ('local_hits', 'shared_hits', 'misses', 'lock_waits')}
+
+    def _count(self, name, amount=1):
+        with _tiers_lock:
+            self._stats[name] += amount
+
+    def _is_local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def _local_key(self, key, version):
+        return self.make_and_validate_key(key, version)
+
+    def _shared_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _set_local(self, key, value, timeout, version):
+        local_timeout = self._local_timeout(timeout)
+        if local_timeout <= 0:
+            self.local.delete(self._local_key(key, version))
+        else:
+            self.local.set(self._local_key(key, version), value, local_timeout)
+
+    def _get_local(self, key, version):
+        value = self.local.get(self._local_key(key, version), self._missing_key)
+        if value is not self._missing_key:
+            self._count('local_hits')
+        return value
+
+    def _got_shared(self, key, value, version):
+        if value is self._missing_key:
+            self._count('misses')
+            return value
+        self._count('shared_hits')
+        if self._is_local(key):
+            self._set_local(key, value, DEFAULT_TIMEOUT, version)
+        return value
+
+    def get(self, key, default=None, version=None):
+        if self._is_local(key):
+            value = self._get_local(key, version)
+            if value is not self._missing_key:
+                return value
+        value = self._got_shared(key, self.shared.get(key, self._missing_key, version), version)
+        return default if value is self._missing_key else value
+
+    async def aget(self, key, default=None, version=None):
+        # L1 hits are answered without leaving the event loop
+        if self._is_local(key):
+            value = self._get_local(key, version)
+            if value is not self._missing_key:
+                return value
+        value = self._got_shared(key, await self.shared.aget(key, self._missing_key, version), version)
+        return default if value is self._missing_key else value
+
+    def _split_many(self, keys, version):
+        found, missing = {}, []
+        for key in keys:
+            value = self._get_local(key, version) if self._is_local(key) else self._missing_key
+            if value is self._missing_key:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def _got_shared_many(self, found, missing, values, version):
+        for key in missing:
+            value = self._got_shared(key, values.get(key, self._missing_key), version)
+            if value is not self._missing_key:
+                found[key] = value
+        return found
+
+    def get_many(self, keys, version=None):
+        found, missing = self._split_many(keys, version)
+        values = self.shared.get_many(missing, version) if missing else {}
+        return self._got_shared_many(found, missing, values, version)
+
+    async def aget_many(self, keys, version=None):
+        found, missing = self._split_many(keys, version)
+        values = await self.shared.aget_many(missing, version) if missing else {}
+        return self._got_shared_many(found, missing, values, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, self._shared_timeout(timeout), version)
+        if self._is_local(key):
+            self._set_local(key, value, timeout, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        await self.shared.aset(key, value, self._shared_timeout(timeout), version)
+        if self._is_local(key):
+            self._set_local(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, self._shared_timeout(timeout), version)
+        if added and self._is_local(key):
+            self._set_local(key, value, timeout, version)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, self._shared_timeout(timeout), version)
+        for key, value in data.items():
+            if self._is_local(key) and key not in failed:
+                self._set_local(key, value, timeout, version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, self._shared_timeout(timeout), version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self._local_key(key, version))
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        if self._is_local(key):
+            if self.local.get(self._local_key(key, version), self._missing_key) is not self._missing_key:
+                return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters change in place, they never belong in L1
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def _lock_key(self, key):
+        return f'lock:{key}'
+
+    def _peek(self, key, value, version):
+        # Polls made while waiting on a lock aren't counted as misses
+        if value is not self._missing_key and self._is_local(key):
+            self._set_local(key, value, DEFAULT_TIMEOUT, version)
+        return value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, self._missing_key, version)
+        if value is not self._missing_key:
+            return value
+
+        deadline = time.monotonic() + self.lock_timeout
+        locked = self.shared.add(self._lock_key(key), True, self.lock_timeout, version)
+        while not locked:
+            # Someone else is computing the value, wait for it up to the lock's timeout
+            self._count('lock_waits')
+            time.sleep(self.lock_poll_interval)
+            value = self._peek(key, self.shared.get(key, self._missing_key, version), version)
+            if value is not self._missing_key:
+                return value
+            if time.monotonic() > deadline:
+                break
+            locked = self.shared.add(self._lock_key(key), True, self.lock_timeout, version)
+
+        try:
+            value = default() if callable(default) else default
+            self.set(key, value, timeout, version)
+        finally:
+            # A caller that gave up waiting must leave the holder's lock alone
+            if locked:
+                self.shared.delete(self._lock_key(key), version)
+        return value
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = await self.aget(key, self._missing_key, version)
+        if value is not self._missing_key:
+            return value
+
+        deadline = time.monotonic() + self.lock_timeout
+        locked = await self.shared.aadd(self._lock_key(key), True, self.lock_timeout, version)
+        while not locked:
+            self._count('lock_waits')
+            await asyncio.sleep(self.lock_poll_interval)
+            value = self._peek(key, await self.shared.aget(key, self._missing_key, version), version)
+            if value is not self._missing_key:
+                return value
+            if time.monotonic() > deadline:
+                break
+            locked = await self.shared.aadd(self._lock_key(key), True, self.lock_timeout, version)
+
+        try:
+            value = default() if callable(default) else default
+            if inspect.isawaitable(value):
+                value = await value
+            await self.aset(key, value, timeout, version)
+        finally:
+            if locked:
+                await self.shared.adelete(self._lock_key(key), version)
+        return value
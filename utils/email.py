@@ -1,44 +1,183 @@
-from .helpers import USER_FORGOT_PASSWORD, USER_VERIFY_ACCOUNT, hash_text
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from users.models import OutboxEmail
+from .helpers import USER_FORGOT_PASSWORD, USER_VERIFY_ACCOUNT, make_account_token
 
 
-def send_verification_email(user):
-    string_context = user.get_context_string(context=USER_VERIFY_ACCOUNT)
-    token = hash_text(string_context)
+logger = logging.getLogger(__name__)
+
+
+def _outbox_settings():
+    return {
+        'ENABLED': True,
+        'BATCH_SIZE': 50,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BACKOFF': 30,
+        'CLAIM_TIMEOUT': 300,
+        **getattr(settings, 'EMAIL_OUTBOX', {})
+    }
+
+def queue_email(user, subject, message):
+    """
+    Records the email in the outbox, inside the caller's transaction when
+    there is one. `process_email_outbox` delivers it. With the outbox
+    disabled the email is sent right away, as before.
+    """
+    if not _outbox_settings()['ENABLED']:
+        user.email_user(subject=subject, message=message, fail_silently=True)
+        return None
+
+    return OutboxEmail.objects.create(to_email=user.email, subject=subject, body=message)
+
+def queue_emails(users, subject, message):
+    """
+    Bulk variant of `queue_email` sending the same email to every user in
+    `users` with a single insert. `message` may also be a callable building
+    each user's own message.
+    """
+    build_message = message if callable(message) else lambda user: message
+    if not _outbox_settings()['ENABLED']:
+        for user in users:
+            user.email_user(subject=subject, message=build_message(user), fail_silently=True)
+        return []
+
+    return OutboxEmail.objects.bulk_create([
+        OutboxEmail(to_email=user.email, subject=subject, body=build_message(user))
+        for user in users
+    ])
+
+def _claim_outbox_batch(batch_size, lease):
+    # Locks are only held while claiming. Claimed rows are pushed past the
+    # lease so other workers skip them, and come due again should this one
+    # die before recording the outcome.
+    with transaction.atomic():
+        now = timezone.now()
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=lease)
+            )
+    return emails, now
+
+def _record_failure(email, exc, config, now):
+    email.last_error = str(exc)
+    if email.attempts >= config['MAX_ATTEMPTS']:
+        email.status = OutboxEmail.Status.FAILED
+    else:
+        backoff = config['RETRY_BACKOFF'] * 2 ** (email.attempts - 1)
+        email.next_attempt_at = now + timedelta(seconds=backoff)
+
+def process_outbox(batch_size=None, connection=None):
+    """
+    Claims one batch of due outbox rows with SELECT ... FOR UPDATE SKIP LOCKED
+    and sends them over a single connection, outside the claiming
+    transaction. Failed sends are retried with exponential backoff until
+    `MAX_ATTEMPTS` is reached. When the connection can't be opened, every
+    claimed row counts a failed attempt.
 
-    user.email_user(
-        subject='Verification Email',
-        message=f'Verify your account with this token:{token}, and uid:{user.pk}',
-        fail_silently=True
+    Returns a `(sent, failed)` tuple for the batch.
+    """
+    config = _outbox_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    # A caller-supplied connection stays open for its next batch
+    owns_connection = connection is None
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+
+    emails, now = _claim_outbox_batch(batch_size, config['CLAIM_TIMEOUT'])
+    if not emails:
+        return sent, failed
+
+    for email in emails:
+        email.attempts += 1
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Opening the email connection failed: %s', exc)
+        for email in emails:
+            _record_failure(email, exc, config, now)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    to=[email.to_email],
+                    connection=connection
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:
+                    logger.warning('Sending outbox email %s failed: %s', email.id, exc)
+                    _record_failure(email, exc, config, now)
+                    failed += 1
+                else:
+                    email.status = OutboxEmail.Status.SENT
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            if owns_connection:
+                connection.close()
+
+    OutboxEmail.objects.bulk_update(
+        emails,
+        ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
     )
+    return sent, failed
+
+
+def _verification_message(user):
+    string_context = user.get_context_string(context=USER_VERIFY_ACCOUNT)
+    token = make_account_token(string_context)
+    return f'Verify your account with this token:{token}, and uid:{user.pk}'
+
+def send_verification_email(user):
+    send_verification_emails([user])
+
+def send_verification_emails(users):
+    queue_emails(users, subject='Verification Email', message=_verification_message)
 
 def send_successful_verification_email(user):    
-    user.email_user(
+    queue_email(
+        user,
         subject='Successful Verification',
-        message='This is to notify you that you are been verified.',
-        fail_silently=True
+        message='This is to notify you that you are been verified.'
     )
 
 def send_password_reset_email(user):
     string_context = user.get_context_string(context=USER_FORGOT_PASSWORD)
-    token = hash_text(string_context)
+    token = make_account_token(string_context)
 
-    user.email_user(
+    queue_email(
+        user,
         subject='Reset Password',
-        message=f'Reset your password with this token:{token}, and uid:{user.pk}',
-        fail_silently=True
+        message=f'Reset your password with this token:{token}, and uid:{user.pk}'
     )
 
 def send_successful_password_reset_email(user):    
-    user.email_user(
+    queue_email(
+        user,
         subject='Successful Password Reset',
-        message='This is to notify you that you have successfully rest your password. Kindly, reach out to HR or Admin if this was done without your knowledge.',
-        fail_silently=True
+        message='This is to notify you that you have successfully rest your password. Kindly, reach out to HR or Admin if this was done without your knowledge.'
     )
 
-def send_deactivation_email(user):    
-    user.email_user(
+def send_deactivation_email(user):
+    send_deactivation_emails([user])
+
+def send_deactivation_emails(users):
+    queue_emails(
+        users,
         subject='Dectivation Email',
-        message='This is to notify you that you are been deactivated. Kindly, reach out to HR or Admin.',
-        fail_silently=True
+        message='This is to notify you that you are been deactivated. Kindly, reach out to HR or Admin.'
     )
 
@@ -1,20 +1,71 @@
+import bcrypt
 import random
 import string
-from passlib.context import CryptContext
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
 
 USER_VERIFY_ACCOUNT = 'verify-account'
 USER_FORGOT_PASSWORD = 'password-reset'
+ACCOUNT_TOKEN_SALT = 'utils.helpers.account-token'
 SPECIAL_CHARACTERS = ['@','#','$','%','=',':','?','.','/','|','~','>']
 # OTHER_SPECIAL_CHARACTERS ['&', '^', ';', '\\', '}', '<', '-', "'", '[', '+', ')', '*', '_', '`', '!', '(', ']', '"', ',', '{']
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _verify_legacy_token(context_string, token):
+    # Legacy tokens are plain bcrypt hashes, checked with the library Django's hashers use
+    try:
+        return bcrypt.checkpw(context_string.encode(), token.encode())
+    except ValueError:
+        return False
+
+def _account_token_signature(context_string, timestamp):
+    return salted_hmac(
+        ACCOUNT_TOKEN_SALT,
+        f'{context_string}{timestamp}',
+        algorithm='sha256'
+    ).hexdigest()[::2]
+
+def _legacy_account_tokens_accepted():
+    legacy_until = getattr(settings, 'ACCOUNT_TOKENS', {}).get('LEGACY_BCRYPT_UNTIL')
+    if not legacy_until:
+        return False
+    legacy_until = datetime.fromisoformat(legacy_until)
+    if timezone.is_naive(legacy_until):
+        legacy_until = legacy_until.replace(tzinfo=dt_timezone.utc)
+    return timezone.now() < legacy_until
+
+def make_account_token(context_string):
+    """
+    Signs a user context string (see `User.get_context_string`) into a
+    one-time token. The token stops verifying once the context string
+    changes or `ACCOUNT_TOKENS['MAX_AGE']` seconds have passed.
+    """
+    timestamp = int(time.time())
+    return f'{int_to_base36(timestamp)}-{_account_token_signature(context_string, timestamp)}'
 
-def hash_text(plain_text):
-    return pwd_context.hash(plain_text)
+def check_account_token(context_string, token):
+    if not token:
+        return False
+
+    # Links issued before the switch carry a bcrypt hash of the context string
+    if token.startswith('$2'):
+        return _legacy_account_tokens_accepted() and _verify_legacy_token(context_string, token)
+
+    try:
+        timestamp_b36, signature = token.split('-')
+        timestamp = base36_to_int(timestamp_b36)
+    except ValueError:
+        return False
+
+    if not constant_time_compare(_account_token_signature(context_string, timestamp), signature):
+        return False
 
-def verify_hashed_text(plain_text, hashed_text):
-    return pwd_context.verify(plain_text, hashed_text)
+    max_age = getattr(settings, 'ACCOUNT_TOKENS', {}).get('MAX_AGE', 60 * 60 * 24 * 3)
+    return (int(time.time()) - timestamp) <= max_age
 
 def generate_strong_password(length=12, include_special_chars=True):
     """
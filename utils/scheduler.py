@@ -0,0 +1,37 @@
+import logging
+import threading
+from django.core.cache import cache
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask(threading.Thread):
+    """
+    Daemon thread calling `func` every `interval` seconds. When several
+    processes run the same task, a shared-cache lock named after the task
+    lets only one of them run it per interval. That holds with a cache
+    whose `add` is atomic such as Redis. With the file-based cache two
+    processes may occasionally both run it, and with a process-local cache
+    every process does, so tasks must be safe to run concurrently.
+    """
+    def __init__(self, name, interval, func):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.func = func
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            if not cache.add(f'scheduler:{self.name}', True, self.interval):
+                continue
+            try:
+                self.func()
+            except Exception:
+                logger.exception('Periodic task %s failed', self.name)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()